@@ -1,11 +1,12 @@
 from . import bsagio, plugin
-from ._types import BaseStepConfig, BaseStepDefinition, ParamBaseStep
+from ._types import BaseStepConfig, BaseStepDefinition, ParamBaseStep, RunConfig
 from .bsag import main
 
 __all__ = [
     "BaseStepConfig",
     "BaseStepDefinition",
     "ParamBaseStep",
+    "RunConfig",
     "bsagio",
     "main",
     "plugin",
@@ -0,0 +1,53 @@
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from bsag._logging import StepLogs
+
+
+@dataclass
+class Checkpoint:
+    """State after running the step at `step_index` (counting the execution plan, then the teardown plan)."""
+
+    step_index: int
+    config_hashes: list[str]
+    data: dict[str, Any]
+    step_logs: list[StepLogs]
+    skip_to_teardown: bool = False
+    step_records: dict[str, Any] = field(default_factory=dict)
+    reusable_records: dict[str, Any] = field(default_factory=dict)
+    unpicklable_keys: list[str] = field(default_factory=list)
+
+
+def checkpoint_path(checkpoint_dir: str | os.PathLike[str], step_index: int) -> Path:
+    return Path(checkpoint_dir, f"{step_index:03d}.pkl")
+
+
+def save_checkpoint(checkpoint_dir: str | os.PathLike[str], checkpoint: Checkpoint) -> None:
+    """Pickles the checkpoint, leaving out (and recording) any `data` entries that can't be pickled."""
+    data: dict[str, Any] = {}
+    for k, v in checkpoint.data.items():
+        try:
+            pickle.dumps(v)
+        except Exception:  # pylint: disable=broad-except
+            # Pickling can fail with nearly anything (TypeError, AttributeError, PicklingError...)
+            checkpoint.unpicklable_keys.append(k)
+            continue
+        data[k] = v
+    checkpoint.data = data
+
+    path = checkpoint_path(checkpoint_dir, checkpoint.step_index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("wb") as f:
+        pickle.dump(checkpoint, f)
+    tmp_path.replace(path)
+
+
+def load_checkpoint(checkpoint_dir: str | os.PathLike[str], step_index: int) -> Checkpoint:
+    # Checkpoints are written by BSAG itself on the local machine, so unpickling them is trusted
+    with checkpoint_path(checkpoint_dir, step_index).open("rb") as f:
+        checkpoint: Checkpoint = pickle.load(f)
+    return checkpoint
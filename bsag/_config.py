@@ -0,0 +1,160 @@
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, TypeVar
+
+import yaml
+
+from bsag._types import BaseStepConfig
+
+EXTENDS_KEY = "extends"
+INCLUDE_KEY = "include"
+
+ConfigT = TypeVar("ConfigT", bound=BaseStepConfig)
+
+
+class ConfigError(Exception):
+    pass
+
+
+def merge_config(base: Any, override: Any) -> Any:
+    """Merges mappings key by key, recursively; anything else (plans, lists, values) in `override` replaces `base`."""
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = dict(base)
+        for k, v in override.items():
+            merged[k] = merge_config(base[k], v) if k in base else v
+        return merged
+    return override
+
+
+class ConfigResolver:
+    """Loads YAML configs, resolving `extends` and plan `include` entries.
+
+    A config may set `extends: <path>` (or a list of paths) to start from other configs, merged with `merge_config`.
+    A plan entry `include: <path>` is replaced by the steps listed in that file. Paths are relative to the file that
+    names them.
+
+    Parsed files and resolved configs are memoized by content hash, and parsed step configs by their merged values, so
+    loading many configs that share fragments parses each fragment once. A resolver may be shared by any number of
+    `BSAG` instances in a process.
+    """
+
+    def __init__(self) -> None:
+        self._fragments: dict[str, Any] = {}
+        self._resolved: dict[str, Any] = {}
+        self._step_configs: dict[tuple[type[BaseStepConfig], str], BaseStepConfig] = {}
+
+    def load(self, path: str | os.PathLike[str]) -> Any:
+        """Returns the fully resolved contents of `path`, which the caller is free to modify."""
+        _, resolved = self._resolve(Path(path).resolve(), ())
+        return copy.deepcopy(resolved)
+
+    def parse_step_config(self, config_type: type[ConfigT], values: dict[str, Any]) -> ConfigT:
+        """Parses a merged step config, reusing an earlier parse of identical values.
+
+        Validation (including checks like `FilePath`) is not repeated for reused configs.
+        """
+        try:
+            values_key = json.dumps(values, sort_keys=True)
+        except (TypeError, ValueError):
+            # YAML can hold values JSON can't represent (e.g. dates); just don't memoize those
+            return config_type.parse_obj(values)
+        key = (config_type, hashlib.sha256(values_key.encode()).hexdigest())
+        if key not in self._step_configs:
+            self._step_configs[key] = config_type.parse_obj(values)
+        config: ConfigT = self._step_configs[key].copy(deep=True)  # type: ignore[assignment]
+        return config
+
+    def _read(self, path: Path) -> tuple[str, Any]:
+        try:
+            content = path.read_bytes()
+        except OSError as e:
+            msg = f"Could not read config file {path}: {e}"
+            raise ConfigError(msg) from e
+        digest = hashlib.blake2b(content, digest_size=32).hexdigest()
+        if digest not in self._fragments:
+            try:
+                self._fragments[digest] = yaml.safe_load(content)
+            except yaml.YAMLError as e:
+                msg = f"Could not parse config file {path}: {e}"
+                raise ConfigError(msg) from e
+        return digest, self._fragments[digest]
+
+    def _resolve(self, path: Path, stack: tuple[Path, ...]) -> tuple[str, Any]:
+        """Returns a key identifying the contents of `path` and everything it references, and its resolved contents.
+
+        Resolved contents are shared with the memo and must not be modified.
+        """
+        if path in stack:
+            chain = " -> ".join(str(p) for p in (*stack, path))
+            msg = f"Config files reference each other in a cycle: {chain}"
+            raise ConfigError(msg)
+        stack = (*stack, path)
+
+        digest, fragment = self._read(path)
+        # References are resolved (and so read) on every load, as any of them may have changed since
+        key = hashlib.blake2b(digest.encode(), digest_size=32)
+        parents: list[Any] = []
+        if isinstance(fragment, dict) and EXTENDS_KEY in fragment:
+            extends = fragment[EXTENDS_KEY]
+            for parent_path in [extends] if isinstance(extends, str) else extends:
+                parent_key, parent = self._resolve(path.parent / parent_path, stack)
+                key.update(parent_key.encode())
+                parents.append(parent)
+        includes: dict[str, Any] = {}
+        for include_path in self._include_paths(fragment):
+            include_key, included = self._resolve(path.parent / include_path, stack)
+            key.update(include_key.encode())
+            includes[include_path] = included
+        resolved_key = key.hexdigest()
+
+        if resolved_key not in self._resolved:
+            self._resolved[resolved_key] = self._merge(path, fragment, parents, includes)
+        return resolved_key, self._resolved[resolved_key]
+
+    @staticmethod
+    def _include_paths(fragment: Any) -> list[str]:
+        plans = [fragment] if isinstance(fragment, list) else []
+        if isinstance(fragment, dict):
+            plans = [v for v in fragment.values() if isinstance(v, list)]
+        return [
+            entry[INCLUDE_KEY]
+            for plan in plans
+            for entry in plan
+            if isinstance(entry, dict) and len(entry) == 1 and isinstance(entry.get(INCLUDE_KEY), str)
+        ]
+
+    @staticmethod
+    def _expand_includes(path: Path, plan: list[Any], includes: dict[str, Any]) -> list[Any]:
+        expanded = []
+        for entry in plan:
+            if isinstance(entry, dict) and len(entry) == 1 and isinstance(entry.get(INCLUDE_KEY), str):
+                included = includes[entry[INCLUDE_KEY]]
+                if not isinstance(included, list):
+                    msg = f"{entry[INCLUDE_KEY]}, included by {path}, must be a list of steps"
+                    raise ConfigError(msg)
+                expanded.extend(included)
+            else:
+                expanded.append(entry)
+        return expanded
+
+    def _merge(self, path: Path, fragment: Any, parents: list[Any], includes: dict[str, Any]) -> Any:
+        if isinstance(fragment, list):
+            return self._expand_includes(path, fragment, includes)
+        if fragment is None:
+            return {}
+        if not isinstance(fragment, dict):
+            msg = f"Config file {path} must hold a mapping or a list of steps"
+            raise ConfigError(msg)
+
+        own = {
+            k: self._expand_includes(path, v, includes) if isinstance(v, list) else v
+            for k, v in fragment.items()
+            if k != EXTENDS_KEY
+        }
+        merged: Any = {}
+        for parent in parents:
+            merged = merge_config(merged, parent)
+        return merge_config(merged, own)
@@ -1,6 +1,9 @@
 from __future__ import annotations  # necessary for loguru
 
+import itertools
+from collections import deque
 from collections.abc import Callable
+from contextvars import ContextVar
 from enum import Flag, auto
 
 import loguru
@@ -8,6 +11,9 @@ from pydantic import BaseModel
 
 from bsag._types import BaseStepWithConfig
 
+CURRENT_STEP_LOGS: ContextVar[StepLogs | None] = ContextVar("bsag_current_step_logs", default=None)
+"""Logs of the step running in the current context, see `BSAGIO.step`."""
+
 
 class LogVisibility(Flag):
     NONE = 0
@@ -38,16 +44,71 @@ def private_formatter(record: loguru.Record) -> str:
     )
 
 
-def create_student_sink(logs: list[StepLogs]) -> Callable[[loguru.Message], None]:
+def create_student_sink(
+    logs: list[StepLogs],
+    max_step_bytes: int | None = None,
+    max_total_bytes: int | None = None,
+) -> Callable[[loguru.Message], None]:
+    retained_bytes = 0
+
+    # loguru serializes calls to each sink, so no further locking is needed
     def student_sink(msg: loguru.Message) -> None:
-        logs[-1].log_chunks.append(msg)
+        nonlocal retained_bytes
+        step_logs = CURRENT_STEP_LOGS.get() or logs[-1]
+        limit = max_step_bytes
+        if max_total_bytes is not None:
+            # A step may always reclaim its own retained bytes by dropping older tail lines
+            remaining = step_logs.retained_bytes + max_total_bytes - retained_bytes
+            limit = remaining if limit is None else min(limit, remaining)
+        retained_bytes += step_logs.append(str(msg), limit)
 
     return student_sink
 
 
 class StepLogs(BaseModel):
+    """Student-facing log lines of one step.
+
+    When a byte limit is given, the first half of it is kept as `log_chunks` and the rest as a rolling window of the
+    latest `tail_chunks`; lines in between are dropped and counted.
+    """
+
     success: bool = False
     log_chunks: list[str] = []
+    tail_chunks: deque[str] = deque()
+    dropped_lines: int = 0
+    head_bytes: int = 0
+    tail_bytes: int = 0
     score: float | None = 0
     name: str
     display_name: str
+    reuse_key: str | None = None
+    duration: float | None = None
+    """Wall-clock seconds the step took, set once it finishes."""
+
+    @property
+    def retained_bytes(self) -> int:
+        return self.head_bytes + self.tail_bytes
+
+    def append(self, chunk: str, max_bytes: int | None = None) -> int:
+        """Adds `chunk`, dropping older tail lines to stay within `max_bytes`. Returns the change in retained bytes."""
+        size = len(chunk.encode())
+        before = self.retained_bytes
+        if max_bytes is None or (not self.tail_chunks and self.head_bytes + size <= max_bytes // 2):
+            self.log_chunks.append(chunk)
+            self.head_bytes += size
+            return size
+
+        self.tail_chunks.append(chunk)
+        self.tail_bytes += size
+        while self.tail_chunks and self.retained_bytes > max_bytes:
+            dropped = self.tail_chunks.popleft()
+            self.tail_bytes -= len(dropped.encode())
+            self.dropped_lines += dropped.count("\n") or 1
+        return self.retained_bytes - before
+
+    def is_empty(self) -> bool:
+        return not self.log_chunks and not self.tail_chunks and not self.dropped_lines
+
+    def text(self) -> str:
+        omitted = [f"\n[... {self.dropped_lines} lines omitted ...]\n\n"] if self.dropped_lines else []
+        return "".join(itertools.chain(self.log_chunks, omitted, self.tail_chunks))
@@ -1,3 +1,4 @@
+import hashlib
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any, Generic, TypeAlias, TypeVar
 
@@ -33,6 +34,23 @@ class BaseStepDefinition(ABC, Generic[C_co]):
     def run(cls, bsagio: "BSAGIO", config: C_co) -> bool:  # type: ignore
         ...
 
+    @classmethod
+    def check_plan(cls, _config: C_co, _run_config: "RunConfig") -> None:  # type: ignore
+        """Raises ValueError if this step can't work correctly alongside the other steps of the loaded config."""
+
+    @classmethod
+    def reusable(cls, _config: C_co) -> bool:  # type: ignore
+        """Returns whether a record saved by `run` (see `BSAGIO.record_step`) can stand in for running this step.
+
+        Reusable steps must not have side effects that later steps depend on.
+        """
+        return False
+
+    @classmethod
+    def replay(cls, bsagio: "BSAGIO", config: C_co, record: Any) -> bool:  # type: ignore
+        """Applies a record saved by a previous run of this step with the same config, instead of running it."""
+        raise NotImplementedError
+
 
 @dataclass
 class StepWithConfig(Generic[C_co]):
@@ -48,6 +66,18 @@ class StepWithConfig(Generic[C_co]):
     def display_name(self) -> str:
         return self.StepType.display_name(self.config)
 
+    def reusable(self) -> bool:
+        return self.StepType.reusable(self.config)
+
+    def replay(self, bsagio: "BSAGIO", record: Any) -> bool:
+        return self.StepType.replay(bsagio, self.config, record)
+
+    def config_hash(self) -> str:
+        """Hash identifying this step and its fully merged config."""
+        h = hashlib.sha256(self.name().encode())
+        h.update(self.config.json(sort_keys=True).encode())
+        return h.hexdigest()
+
 
 BaseStepWithConfig: TypeAlias = StepWithConfig[BaseStepConfig]
 ParamBaseStep: TypeAlias = BaseStepDefinition[BaseStepConfig]
@@ -57,6 +87,30 @@ class RunConfig(BaseModel, extra=Extra.forbid):
     execution_plan: list[BaseStepWithConfig] = []
     teardown_plan: list[BaseStepWithConfig] = []
 
+    def config_hash(self) -> str:
+        h = hashlib.sha256()
+        for plan in (self.execution_plan, self.teardown_plan):
+            for swc in plan:
+                h.update(swc.config_hash().encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def reuse_keys(self) -> list[str | None]:
+        """Keys under which each execution plan step's records can be reused, or None if it must always run.
+
+        A reusable step's key covers its own config and those of all earlier non-reusable steps, whose side effects
+        (e.g. compiled files) it may depend on.
+        """
+        deps = hashlib.sha256()
+        keys: list[str | None] = []
+        for swc in self.execution_plan:
+            if swc.reusable():
+                keys.append(hashlib.sha256(f"{deps.hexdigest()}{swc.config_hash()}".encode()).hexdigest())
+            else:
+                deps.update(swc.config_hash().encode())
+                keys.append(None)
+        return keys
+
 
 class ConfigPreDiscoveryYaml(BaseModel, extra=Extra.forbid):
     shared_parameters: dict[str, Any] = {}
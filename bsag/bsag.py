@@ -1,18 +1,32 @@
+import cProfile
+import importlib
+import io
 import itertools
+import json
+import os
+import pickle
+import pstats
 import sys
+import time
+import traceback
 from argparse import ArgumentParser
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, get_args
+from typing import Any, NoReturn, TextIO, get_args
 
 import pluggy  # type: ignore
-import yaml
 from devtools import debug
 from loguru import logger
+from pydantic import ValidationError
 
 import bsag.plugin
+from bsag._checkpoint import Checkpoint, load_checkpoint, save_checkpoint
+from bsag._config import ConfigError, ConfigResolver
 from bsag._logging import StepLogs
 from bsag._types import (
     BaseStepConfig,
+    BaseStepDefinition,
     BaseStepWithConfig,
     ConfigPreDiscoveryYaml,
     GlobalConfig,
@@ -20,8 +34,9 @@ from bsag._types import (
     RunConfig,
     StepWithConfig,
 )
-from bsag.bsagio import BSAGIO
+from bsag.bsagio import BSAGIO, CONFIG_HASH_KEY
 from bsag.plugin import PROJECT_NAME, hookimpl
+from bsag.utils.workdirs import wait_for_cleanup
 
 
 def get_plugin_manager():
@@ -35,70 +50,205 @@ def get_plugin_manager():
 @hookimpl  # type: ignore
 def bsag_load_step_defs() -> list[type[ParamBaseStep]]:
     # Defer to avoid circular imports
-    from bsag.steps.common import DisplayMessage, RunCommand
-    from bsag.steps.gradescope import Lateness, LimitVelocity, ReadSubMetadata, WriteResults
+    from bsag.steps.common import Benchmark, BuildManifest, DisplayMessage, RunCommand
+    from bsag.steps.gradescope import (
+        IncrementalRegrade,
+        Lateness,
+        LimitVelocity,
+        ReadSubMetadata,
+        SkipResubmission,
+        WriteResults,
+    )
+    from bsag.steps.java import JavaCompile, JavaRun, StartCompileServer
 
     return [
         ReadSubMetadata,
         Lateness,
         LimitVelocity,
+        SkipResubmission,
+        IncrementalRegrade,
         WriteResults,
         DisplayMessage,
         RunCommand,
+        BuildManifest,
+        Benchmark,
+        StartCompileServer,
+        JavaCompile,
+        JavaRun,
     ]
 
 
+def discover_step_defs() -> list[type[ParamBaseStep]]:
+    pm = get_plugin_manager()
+    # type: ignore
+    # pylint: disable-next=no-member
+    return list(itertools.chain(*pm.hook.bsag_load_step_defs()))  # type: ignore
+
+
+PLUGIN_LOCK_VERSION = 1
+DEFAULT_PLUGIN_LOCK = "bsag-plugins.lock.json"
+
+
+def freeze_plugins(lock_path: str) -> dict[str, str]:
+    """Writes the step name -> `module:qualname` mapping of all discovered steps to `lock_path`."""
+    steps = {
+        m.name(): f"{m.__module__}:{m.__qualname__}"
+        for m in discover_step_defs()
+        # Can't be imported by name later; these must be passed to `main` anyway
+        if m.__module__ != "__main__"
+    }
+    lock = {
+        "version": PLUGIN_LOCK_VERSION,
+        "python": list(sys.version_info[:2]),
+        "steps": steps,
+    }
+    with Path(lock_path).open("w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+    return steps
+
+
+def load_plugin_lock(lock_path: str) -> dict[str, str] | None:
+    """Returns the frozen step mapping, or None if the lockfile is missing or was written for another environment."""
+    try:
+        with Path(lock_path).open(encoding="utf-8") as f:
+            lock = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if lock.get("version") != PLUGIN_LOCK_VERSION or lock.get("python") != list(sys.version_info[:2]):
+        return None
+    steps: dict[str, str] = lock.get("steps", {})
+    return steps
+
+
+def import_frozen_step_def(step_name: str, target: str) -> type[ParamBaseStep] | None:
+    module_name, _, qualname = target.partition(":")
+    try:
+        obj: Any = importlib.import_module(module_name)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+    except (ImportError, AttributeError, ValueError):
+        return None
+    if not (isinstance(obj, type) and issubclass(obj, BaseStepDefinition)) or obj.name() != step_name:
+        return None
+    return obj  # type: ignore
+
+
+SUBMISSION_LOG_SUFFIX = ".bsag.log"
+
+
+@dataclass
+class SubmissionRun:
+    submission_dir: Path
+    exit_code: int | None = None
+    success: bool = False
+    step_results: list[dict[str, Any]] = field(default_factory=list)
+    """`name`, `display_name` and `success` of each step that ran, in plan order."""
+
+    @property
+    def log_path(self) -> Path:
+        """Private log of the run, next to the submission so it isn't graded along with it."""
+        submission_dir = self.submission_dir.resolve()
+        return submission_dir.with_name(submission_dir.name + SUBMISSION_LOG_SUFFIX)
+
+
+# Shared by all BSAG instances, so loading many configs in one process parses shared fragments once
+_config_resolver = ConfigResolver()
+
+
 class BSAG:
     def __init__(
         self,
-        config_path: str,
+        config_path: str | None,
         global_config_path: str | None = None,
         step_defs: list[type[ParamBaseStep]] | None = None,
         colorize: bool = False,
         log_level: str = "DEBUG",
+        profile_dir: str | None = None,
+        plugin_lock: str | None = None,
+        student_log_step_limit: int | None = None,
+        student_log_total_limit: int | None = None,
+        checkpoint_dir: str | None = None,
+        resume_from: str | None = None,
+        config_resolver: ConfigResolver | None = None,
     ):
-        if not step_defs:
-            step_defs = []
-        pm = get_plugin_manager()
-        # type: ignore
-        # pylint: disable-next=no-member
-        plugin_steps: list[type[ParamBaseStep]] = list(itertools.chain(*pm.hook.bsag_load_step_defs()))  # type: ignore
-        self._step_defs = {m.name(): m for m in plugin_steps + step_defs}
+        self._user_step_defs = {m.name(): m for m in step_defs or []}
+        # With a valid lockfile, step definitions are imported lazily as the config references them
+        self._frozen_steps = load_plugin_lock(plugin_lock) if plugin_lock else None
+        self._step_defs: dict[str, type[ParamBaseStep]]
+        if self._frozen_steps is None:
+            self._step_defs = {m.name(): m for m in discover_step_defs()} | self._user_step_defs
+        else:
+            self._step_defs = dict(self._user_step_defs)
+        self._config_resolver = config_resolver or _config_resolver
         self._global_config = self._load_yaml_global_config(global_config_path)
-        self._config = self._load_yaml_config(config_path)
-        self._bsagio = BSAGIO(colorize_private=colorize, log_level_private=log_level)
+        # Without a config, only steps and the global config are loaded, e.g. to validate configs with `load_config`
+        self._config = self._load_yaml_config(config_path) if config_path is not None else RunConfig()
         self._colorize = colorize
+        self._log_level = log_level
+        self._student_log_limits = (student_log_step_limit, student_log_total_limit)
+        self._bsagio = self._create_bsagio(colorize_private=colorize)
+        self._profile_dir = Path(profile_dir) if profile_dir else None
+        self._profile_paths: list[Path] = []
+        self._checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self._resume_from = resume_from
+
+    def _create_bsagio(self, colorize_private: bool = False, private_sink: TextIO | None = None) -> BSAGIO:
+        step_limit, total_limit = self._student_log_limits
+        return BSAGIO(
+            colorize_private=colorize_private,
+            log_level_private=self._log_level,
+            private_sink=private_sink,
+            student_log_step_limit=step_limit,
+            student_log_total_limit=total_limit,
+        )
 
     def _load_yaml_global_config(self, global_config_path: str | None) -> GlobalConfig:
         if global_config_path:
-            with Path(global_config_path).open(encoding="utf-8") as f:
-                return GlobalConfig.parse_obj(yaml.safe_load(f))
+            return GlobalConfig.parse_obj(self._config_resolver.load(global_config_path))
         else:
             return GlobalConfig()
 
     def _load_yaml_config(self, config_path: str) -> RunConfig:
-        with Path(config_path).open(encoding="utf-8") as f:
-            predisc_config = ConfigPreDiscoveryYaml.parse_obj(yaml.safe_load(f))
+        predisc_config = ConfigPreDiscoveryYaml.parse_obj(self._config_resolver.load(config_path))
 
         config = RunConfig()
-        self._global_config.shared_parameters |= predisc_config.shared_parameters
+        # Not merged into the global config, which may be shared with other configs loaded later
+        shared_parameters = self._global_config.shared_parameters | predisc_config.shared_parameters
 
         self._process_step_plan(
             predisc_config.execution_plan,
             config.execution_plan,
+            shared_parameters,
         )
         self._process_step_plan(
             predisc_config.teardown_plan,
             config.teardown_plan,
+            shared_parameters,
         )
 
+        for swc in config.execution_plan + config.teardown_plan:
+            try:
+                swc.StepType.check_plan(swc.config, config)
+            except ValueError as e:
+                msg = f"Step `{swc.name()}` is misplaced: {e}"
+                raise ConfigError(msg) from e
+
         return config
 
+    def load_config(self, config_path: str) -> RunConfig:
+        """Loads another config with this instance's steps and global config, e.g. to validate many configs.
+
+        Raises `ConfigError` or pydantic's `ValidationError` if the config is invalid.
+        """
+        return self._load_yaml_config(config_path)
+
     def _process_step_plan(
         self,
         source_plan: list[str | dict[str, dict[str, Any]]],
         target_plan: list[BaseStepWithConfig],
+        shared_parameters: dict[str, Any],
     ) -> None:
+        shared_by_type: dict[type[BaseStepConfig], dict[str, Any]] = {}
         for step in source_plan:
             step_config: dict[str, Any]
             if isinstance(step, str):
@@ -108,65 +258,330 @@ class BSAG:
                 step_name = next(iter(step.keys()))
                 step_config = step[step_name]
             else:
-                print(f"Step `{step}` not formatted properly")
-                sys.exit(1)
+                msg = f"Step `{step}` not formatted properly"
+                raise ConfigError(msg)
 
-            if step_name not in self._step_defs:
-                print(f"Step `{step_name}` not found", file=sys.stderr)
-                print(f"Available steps: {list(self._step_defs.keys())}")
-                sys.exit(1)
+            StepDefType = self._get_step_def(step_name)
+            if StepDefType is None:
+                msg = f"Step `{step_name}` not found. Available steps: {list(self._step_defs.keys())}"
+                raise ConfigError(msg)
 
-            StepDefType = self._step_defs[step_name]
             StepConfigType: type[BaseStepConfig]
             StepConfigType = get_args(StepDefType.__orig_bases__[0])[0]  # type: ignore
-            # Prioritize specific configs over global
-            step_config = self._global_config.global_settings.get(step_name, {}) | step_config
-
-            # Merge relevant global shared parameters...
-            for k, v in self._global_config.shared_parameters.items():
-                # ... prioritizing params in step config
-                if k in StepConfigType.__fields__ and k not in step_config:
-                    step_config[k] = v
+            # Shared parameters relevant to this config type, computed once per type
+            if StepConfigType not in shared_by_type:
+                shared_by_type[StepConfigType] = {
+                    k: v for k, v in shared_parameters.items() if k in StepConfigType.__fields__
+                }
+            # Prioritize step configs over global settings, and both over shared parameters
+            step_config = (
+                shared_by_type[StepConfigType] | self._global_config.global_settings.get(step_name, {}) | step_config
+            )
 
             target_plan.append(
                 StepWithConfig(
                     StepType=StepDefType,
-                    config=StepConfigType.parse_obj(step_config),
+                    config=self._config_resolver.parse_step_config(StepConfigType, step_config),
                 )
             )
 
-    def run(self) -> None:
+    def _get_step_def(self, step_name: str) -> type[ParamBaseStep] | None:
+        if step_name in self._step_defs:
+            return self._step_defs[step_name]
+
+        if self._frozen_steps is not None:
+            target = self._frozen_steps.get(step_name)
+            StepDefType = import_frozen_step_def(step_name, target) if target else None
+            if StepDefType is not None:
+                self._step_defs[step_name] = StepDefType
+                return StepDefType
+            # Stale lockfile, so fall back to full discovery
+            print(f"Step `{step_name}` not usable from plugin lockfile, discovering plugins", file=sys.stderr)
+            self._frozen_steps = None
+            self._step_defs = {m.name(): m for m in discover_step_defs()} | self._user_step_defs
+
+        return self._step_defs.get(step_name)
+
+    def run(self) -> bool:
+        """Runs the execution plan, then the teardown plan.
+
+        Returns whether both finished without halting or erroring.
+        """
+        all_steps = self._config.execution_plan + self._config.teardown_plan
+        config_hashes = [swc.config_hash() for swc in all_steps]
+        reuse_keys = self._config.reuse_keys() + [None] * len(self._config.teardown_plan)
+        start_index = 0
+        if self._resume_from is not None:
+            start_index = self._resume(all_steps, config_hashes)
+            if start_index < 0:
+                return False
+
         # loguru catch wll not reraise by default
-        @self._bsagio.private.catch()
-        def execute_plan(plan: list[BaseStepWithConfig]) -> None:
-            for swc in plan:
-                self._bsagio.step_logs.append(StepLogs(name=swc.name(), display_name=swc.display_name()))
-                with logger.contextualize(swc=swc):
-                    self._bsagio.private.trace(f"Starting {swc.StepType.name()}")
-                    debug_config = debug.format(swc.config).str(highlight=self._colorize)
-                    self._bsagio.private.trace(f"Using config:\n{debug_config}")
-                    step_result = swc.run(self._bsagio)
-                    if step_result:
-                        self._bsagio.step_logs[-1].success = True
-                    elif swc.config.halt_on_fail:
-                        msg = f"Step {swc.StepType.name()} failed and halts on failure."
-                        # This is a known exception, so kill the traceback
-                        sys.tracebacklimit = 0
-                        raise RuntimeError(msg)
-                    self._bsagio.private.trace(f"Finished {swc.StepType.name()}")
+        @self._bsagio.private.catch(default=False)
+        def execute_plan(plan: list[BaseStepWithConfig], offset: int, can_skip: bool) -> bool:
+            for i, swc in enumerate(plan, start=offset):
+                if i < start_index:
+                    continue
+                if can_skip and self._bsagio.skip_to_teardown:
+                    self._bsagio.private.info(f"Skipping {swc.name()}, continuing to teardown")
+                else:
+                    self._execute_step(swc, reuse_keys[i])
+                if self._checkpoint_dir is not None:
+                    self._checkpoint(i, config_hashes[: i + 1])
+            return True
 
+        self._bsagio.data[CONFIG_HASH_KEY] = self._config.config_hash()
         old_tb = getattr(sys, "tracebacklimit", 1000)
-        execute_plan(self._config.execution_plan)
-        sys.tracebacklimit = old_tb
-        execute_plan(self._config.teardown_plan)
-        sys.tracebacklimit = old_tb
+        try:
+            execution_ok = execute_plan(self._config.execution_plan, 0, can_skip=True)
+            sys.tracebacklimit = old_tb
+            teardown_ok = execute_plan(self._config.teardown_plan, len(self._config.execution_plan), can_skip=False)
+            sys.tracebacklimit = old_tb
+        finally:
+            self._bsagio.run_cleanups()
+        if self._profile_paths:
+            self._log_profile_summary()
+        return execution_ok and teardown_ok
+
+    def _execute_step(self, swc: BaseStepWithConfig, reuse_key: str | None) -> None:
+        step_logs = StepLogs(name=swc.name(), display_name=swc.display_name(), reuse_key=reuse_key)
+        start = time.perf_counter()
+        with self._bsagio.step(step_logs), logger.contextualize(swc=swc):
+            self._bsagio.private.trace(f"Starting {swc.StepType.name()}")
+            debug_config = debug.format(swc.config).str(highlight=self._colorize)
+            self._bsagio.private.trace(f"Using config:\n{debug_config}")
+            if reuse_key is not None and reuse_key in self._bsagio.reusable_records:
+                self._bsagio.private.info(f"Reusing previous results of {swc.name()}, config unchanged")
+                record = self._bsagio.reusable_records[reuse_key]
+                step_result = swc.replay(self._bsagio, record)
+                self._bsagio.record_step(record)
+            else:
+                step_result = self._run_step(swc)
+            if step_result:
+                step_logs.success = True
+            elif swc.config.halt_on_fail:
+                msg = f"Step {swc.StepType.name()} failed and halts on failure."
+                # This is a known exception, so kill the traceback
+                sys.tracebacklimit = 0
+                raise RuntimeError(msg)
+            step_logs.duration = time.perf_counter() - start
+            self._bsagio.private.trace(f"Finished {swc.StepType.name()}")
+
+    def _checkpoint(self, step_index: int, config_hashes: list[str]) -> None:
+        assert self._checkpoint_dir is not None
+        checkpoint = Checkpoint(
+            step_index=step_index,
+            config_hashes=config_hashes,
+            data=self._bsagio.data,
+            step_logs=self._bsagio.step_logs,
+            skip_to_teardown=self._bsagio.skip_to_teardown,
+            step_records=self._bsagio.step_records,
+            reusable_records=self._bsagio.reusable_records,
+        )
+        save_checkpoint(self._checkpoint_dir, checkpoint)
+        if checkpoint.unpicklable_keys:
+            self._bsagio.private.debug(f"Checkpoint {step_index} left out data: {checkpoint.unpicklable_keys}")
+
+    def _resume(self, all_steps: list[BaseStepWithConfig], config_hashes: list[str]) -> int:
+        """Restores the checkpoint before the `--resume-from` step. Returns that step's index, or -1 on failure."""
+        assert self._resume_from is not None
+        if self._resume_from.isdigit():
+            start_index = int(self._resume_from)
+        else:
+            names = [swc.name() for swc in all_steps]
+            start_index = names.index(self._resume_from) if self._resume_from in names else len(all_steps)
+        if start_index >= len(all_steps):
+            self._bsagio.private.error(f"No step `{self._resume_from}` to resume from")
+            return -1
+        if start_index == 0:
+            return 0
+        if self._checkpoint_dir is None:
+            self._bsagio.private.error("Resuming requires a checkpoint directory")
+            return -1
+
+        try:
+            checkpoint = load_checkpoint(self._checkpoint_dir, start_index - 1)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            self._bsagio.private.error(f"Could not load checkpoint for step {start_index - 1}: {e}")
+            return -1
+        if checkpoint.config_hashes != config_hashes[:start_index]:
+            self._bsagio.private.error("Config of steps before the resumed step changed since the checkpoint")
+            return -1
+
+        self._bsagio.data.update(checkpoint.data)
+        # The student sink holds a reference to this list, so it must be updated in place
+        self._bsagio.step_logs[:] = checkpoint.step_logs
+        self._bsagio.skip_to_teardown = checkpoint.skip_to_teardown
+        self._bsagio.step_records = checkpoint.step_records
+        self._bsagio.reusable_records = checkpoint.reusable_records
+        if checkpoint.unpicklable_keys:
+            self._bsagio.private.warning(f"Data not restored from checkpoint: {checkpoint.unpicklable_keys}")
+        self._bsagio.private.info(f"Resuming from step {start_index} ({all_steps[start_index].name()})")
+        return start_index
+
+    def run_many(self, submission_dirs: Sequence[str | os.PathLike[str]], max_procs: int) -> list[SubmissionRun]:
+        """Grades each submission in a forked child, sharing the already loaded plugins and config.
+
+        Each child runs with the submission directory as its working directory, so relative paths in the config
+        resolve per submission. Its private log goes to `<dir>.bsag.log` next to that directory. At most `max_procs`
+        children run at once.
+        """
+        runs = [SubmissionRun(Path(d)) for d in submission_dirs]
+        pending = list(reversed(list(enumerate(runs))))
+        active: dict[int, tuple[SubmissionRun, int]] = {}
+
+        while pending or active:
+            while pending and len(active) < max_procs:
+                index, sub_run = pending.pop()
+                read_fd, write_fd = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    os.close(read_fd)
+                    self._run_forked(index, sub_run, write_fd)
+                os.close(write_fd)
+                active[pid] = (sub_run, read_fd)
+                self._bsagio.private.debug(f"Started grading {sub_run.submission_dir} in process {pid}")
+
+            pid, status = os.wait()
+            if pid not in active:
+                continue
+            sub_run, read_fd = active.pop(pid)
+            sub_run.exit_code = os.waitstatus_to_exitcode(status)
+            # At ~100 bytes per step, summaries stay far below the pipe buffer size, so children never block on them
+            with os.fdopen(read_fd, encoding="utf-8") as f:
+                summary = f.read()
+            if summary:
+                sub_run.step_results = json.loads(summary)
+            sub_run.success = sub_run.exit_code == 0
+            self._bsagio.private.info(f"Graded {sub_run.submission_dir}, exit code {sub_run.exit_code}")
+
+        return runs
+
+    def _run_forked(self, index: int, sub_run: SubmissionRun, summary_fd: int) -> NoReturn:
+        exit_code = 2
+        try:
+            log_path = sub_run.log_path
+            if self._profile_dir is not None:
+                # Children run at once, so each needs its own files and summary
+                self._profile_dir = self._profile_dir.resolve() / f"{index:04d}-{sub_run.submission_dir.resolve().name}"
+            os.chdir(sub_run.submission_dir)
+            with log_path.open("w", encoding="utf-8") as log_file:
+                # Drop the parent's sinks before the fresh BSAGIO adds its own
+                logger.remove()
+                self._bsagio = self._create_bsagio(private_sink=log_file)
+                self._profile_paths = []
+                exit_code = 0 if self.run() else 1
+                logger.remove()
+            # os._exit skips waiting for background cleanup of isolated working directories
+            wait_for_cleanup()
+            with os.fdopen(summary_fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    [
+                        {"name": log.name, "display_name": log.display_name, "success": log.success}
+                        for log in self._bsagio.step_logs
+                    ],
+                    f,
+                )
+        except BaseException:  # pylint: disable=broad-except
+            traceback.print_exc()
+        finally:
+            # Never let a child fall back into the parent's scheduling loop
+            os._exit(exit_code)
+
+    def _run_step(self, swc: BaseStepWithConfig) -> bool:
+        if self._profile_dir is None:
+            return swc.run(self._bsagio)
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(swc.run, self._bsagio)
+        finally:
+            self._profile_dir.mkdir(parents=True, exist_ok=True)
+            path = self._profile_dir / f"{len(self._profile_paths):02d}-{swc.name()}.pstats"
+            profiler.dump_stats(path)
+            self._profile_paths.append(path)
+            self._bsagio.private.debug(f"Wrote profile to {path}")
+
+    def _log_profile_summary(self, limit: int = 30) -> None:
+        summary = io.StringIO()
+        stats = pstats.Stats(*(str(p) for p in self._profile_paths), stream=summary)
+        stats.sort_stats(pstats.SortKey.TIME, pstats.SortKey.CUMULATIVE).print_stats(limit)
+        self._bsagio.private.info(f"Profile of all steps:\n{summary.getvalue()}")
+
+    def write_timings(self, path: str | os.PathLike[str], total: float) -> None:
+        """Writes the duration of the run and of each step that ran to `path` as JSON."""
+        timings = {
+            "total": total,
+            "steps": [
+                {"name": log.name, "display_name": log.display_name, "success": log.success, "duration": log.duration}
+                for log in self._bsagio.step_logs
+            ],
+        }
+        with Path(path).open("w", encoding="utf-8") as f:
+            json.dump(timings, f, indent=2)
 
     @property
     def config(self) -> RunConfig:
         return self._config
 
 
+def plugins_main(argv: list[str]) -> None:
+    parser = ArgumentParser(prog="bsag plugins", description="Manage BSAG plugins")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    freeze_parser = subparsers.add_parser("freeze", help="Record discovered steps to a lockfile")
+    freeze_parser.add_argument("--output", default=DEFAULT_PLUGIN_LOCK, help="Path to write the lockfile to")
+    args = parser.parse_args(argv)
+
+    if args.command == "freeze":
+        steps = freeze_plugins(args.output)
+        print(f"Froze {len(steps)} steps to {args.output}")
+
+
+def validate_main(argv: list[str], steps: list[type[ParamBaseStep]] | None = None) -> None:
+    parser = ArgumentParser(prog="bsag validate", description="Check that configs load, without running them")
+    parser.add_argument("configs", nargs="+", metavar="CONFIG", help="Paths to config files")
+    parser.add_argument("--global-config", help="Path to global config file")
+    parser.add_argument(
+        "--plugin-lock",
+        metavar="PATH",
+        help=f"Load steps from a lockfile written by `bsag plugins freeze` (e.g. {DEFAULT_PLUGIN_LOCK})",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        # Steps are discovered once, and fragments shared between configs parsed once
+        bsag = BSAG(
+            config_path=None, global_config_path=args.global_config, step_defs=steps, plugin_lock=args.plugin_lock
+        )
+    except (ConfigError, ValidationError) as e:
+        print(f"{args.global_config}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = 0
+    for config_path in args.configs:
+        try:
+            bsag.load_config(config_path)
+        except (ConfigError, ValidationError) as e:
+            print(f"{config_path}: {e}", file=sys.stderr)
+            failed += 1
+    print(f"{len(args.configs) - failed} of {len(args.configs)} configs valid")
+    sys.exit(1 if failed else 0)
+
+
 def main(steps: list[type[ParamBaseStep]] | None = None) -> None:
+    if sys.argv[1:2] == ["plugins"]:
+        plugins_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["validate"]:
+        validate_main(sys.argv[2:], steps)
+        return
+    if sys.argv[1:2] == ["loadtest"]:
+        # Deferred, as grading runs never need it
+        from bsag.loadtest import loadtest_main
+
+        loadtest_main(sys.argv[2:])
+        return
+
     parser = ArgumentParser(description="A Better Simple AutoGrader")
     parser.add_argument("--dry-run", action="store_true", help="Parse config, but don't run.")
     parser.add_argument("--global-config", help="Path to global config file")
@@ -179,17 +594,94 @@ def main(steps: list[type[ParamBaseStep]] | None = None) -> None:
         type=str.upper,
         help="Customize private log level",
     )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help=(
+            "Profile each step, writing `.pstats` files to DIR (a subdirectory per submission with --submissions)"
+            " and a summary to the private log"
+        ),
+    )
+    parser.add_argument(
+        "--plugin-lock",
+        metavar="PATH",
+        help=f"Load steps from a lockfile written by `bsag plugins freeze` (e.g. {DEFAULT_PLUGIN_LOCK})",
+    )
+    parser.add_argument(
+        "--student-log-step-limit",
+        type=int,
+        default=64 * 1024,
+        metavar="BYTES",
+        help="Maximum student log size per step; the first and last lines are kept (0 for no limit)",
+    )
+    parser.add_argument(
+        "--student-log-total-limit",
+        type=int,
+        default=512 * 1024,
+        metavar="BYTES",
+        help="Maximum student log size across all steps (0 for no limit)",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        metavar="DIR",
+        help="Save a checkpoint of BSAG data, logs and results to DIR after each step",
+    )
+    parser.add_argument(
+        "--resume-from",
+        metavar="STEP",
+        help="Resume from a step (name or index across both plans) using checkpoints in --checkpoint-dir",
+    )
+    parser.add_argument(
+        "--submissions",
+        nargs="+",
+        metavar="DIR",
+        help="Grade each submission directory in a forked process, reusing the loaded plugins and config",
+    )
+    parser.add_argument(
+        "--max-procs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Maximum number of submissions graded at once with --submissions",
+    )
+    parser.add_argument(
+        "--timings",
+        metavar="PATH",
+        help="Write the duration of the run and of each step to PATH as JSON",
+    )
     args = parser.parse_args()
+    if args.resume_from and not args.checkpoint_dir:
+        parser.error("--resume-from requires --checkpoint-dir")
 
-    bsag = BSAG(
-        config_path=args.config,
-        global_config_path=args.global_config,
-        step_defs=steps,
-        colorize=args.colorize,
-        log_level=args.log_level,
-    )
+    try:
+        bsag = BSAG(
+            config_path=args.config,
+            global_config_path=args.global_config,
+            step_defs=steps,
+            colorize=args.colorize,
+            log_level=args.log_level,
+            profile_dir=args.profile,
+            plugin_lock=args.plugin_lock,
+            student_log_step_limit=args.student_log_step_limit or None,
+            student_log_total_limit=args.student_log_total_limit or None,
+            checkpoint_dir=args.checkpoint_dir,
+            resume_from=args.resume_from,
+        )
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
     if args.dry_run:
         debug(bsag.config)
         sys.exit(0)
 
+    if args.submissions:
+        runs = bsag.run_many(args.submissions, max_procs=args.max_procs)
+        failed = [run for run in runs if not run.success]
+        print(f"Graded {len(runs)} submissions, {len(failed)} failed")
+        for run in failed:
+            print(f"  {run.submission_dir}: exit code {run.exit_code}, see {run.log_path}", file=sys.stderr)
+        sys.exit(1 if failed else 0)
+
+    start = time.perf_counter()
     bsag.run()
+    if args.timings:
+        bsag.write_timings(args.timings, time.perf_counter() - start)
@@ -1,10 +1,14 @@
 import contextlib
+import contextvars
 import sys
-from typing import Any
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, TextIO, TypeVar
 
 from loguru import logger
 
 from bsag._logging import (
+    CURRENT_STEP_LOGS,
     LogVisibility,
     StepLogs,
     create_student_sink,
@@ -13,13 +17,42 @@ from bsag._logging import (
     student_filter,
 )
 
+CONFIG_HASH_KEY = "bsag_config_hash"
+"""Set by BSAG before running any step.
+
+Type: `str`, hash of the fully merged run config (see `RunConfig.config_hash`)
+"""
+
+T = TypeVar("T")
+U = TypeVar("U")
+
 
 class BSAGIO:
-    def __init__(self, colorize_private: bool = False, log_level_private: str = "DEBUG") -> None:
+    """Data and logging shared by all steps.
+
+    Steps may do work in parallel. Logs are attributed to the step whose context they are made in, which asyncio tasks
+    inherit automatically. Threads do not, so submit work to threads with `submit` or `map_concurrently`.
+    `Results.add_test` (from `bsag.steps.gradescope`) and `record_step` are safe to call from any thread.
+    """
+
+    def __init__(
+        self,
+        colorize_private: bool = False,
+        log_level_private: str = "DEBUG",
+        private_sink: TextIO | None = None,
+        student_log_step_limit: int | None = None,
+        student_log_total_limit: int | None = None,
+    ) -> None:
         # TODO: verify data entries by changing it to Pydantic create_model and asking models for fields?
         self.data: dict[str, Any] = {}
         self.step_logs: list[StepLogs] = []
         self.colorize_private = colorize_private
+        # Set by a step to end the execution plan early; the teardown plan still runs
+        self.skip_to_teardown = False
+        # Records saved by reusable steps in this run, and records from a previous run that may be replayed
+        self.step_records: dict[str, Any] = {}
+        self.reusable_records: dict[str, Any] = {}
+        self._cleanups: list[Callable[[], None]] = []
 
         self.student = logger.bind(visibility=LogVisibility.LOG_STUDENT)
         self.private = logger.bind(visibility=LogVisibility.LOG_PRIVATE)
@@ -30,13 +63,63 @@ class BSAGIO:
         with contextlib.suppress(ValueError):
             logger.remove(0)
 
-        student_sink = create_student_sink(self.step_logs)
+        student_sink = create_student_sink(self.step_logs, student_log_step_limit, student_log_total_limit)
         # Student logs are never formatted
         logger.add(student_sink, filter=student_filter, format="{message}")
         logger.add(
-            sys.stdout,
+            private_sink or sys.stdout,
             filter=private_filter,
             format=private_formatter,
             colorize=colorize_private,
             level=log_level_private,
         )
+
+    @contextlib.contextmanager
+    def step(self, step_logs: StepLogs) -> Iterator[StepLogs]:
+        """Attributes logs made in this context, including tasks and `submit`-ted work, to `step_logs`."""
+        self.step_logs.append(step_logs)
+        token = CURRENT_STEP_LOGS.set(step_logs)
+        try:
+            yield step_logs
+        finally:
+            CURRENT_STEP_LOGS.reset(token)
+
+    @property
+    def current_step_logs(self) -> StepLogs:
+        return CURRENT_STEP_LOGS.get() or self.step_logs[-1]
+
+    def submit(self, executor: Executor, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        """Like `executor.submit`, but `fn` runs in (a copy of) the current context, so its logs reach this step."""
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def map_concurrently(self, fn: Callable[[U], T], items: Iterable[U], max_workers: int | None = None) -> list[T]:
+        """Calls `fn` on each item in a thread pool, returning results in order. Exceptions are re-raised."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [self.submit(executor, fn, item) for item in items]
+            return [f.result() for f in futures]
+
+    def add_cleanup(self, fn: Callable[[], None]) -> None:
+        """Registers `fn` to run when the run ends, even on failure, e.g. to stop a helper process started by a step.
+
+        Unlike `atexit`, this also works for submissions graded in forked processes, which exit without running atexit.
+        """
+        self._cleanups.append(fn)
+
+    def run_cleanups(self) -> None:
+        """Runs registered cleanups, most recent first. Called by BSAG at the end of a run."""
+        while self._cleanups:
+            fn = self._cleanups.pop()
+            try:
+                fn()
+            except Exception:  # pylint: disable=broad-except
+                self.private.exception(f"Cleanup {fn} failed")
+
+    def record_step(self, record: Any) -> None:
+        """Saves a JSON-serializable record of the current step's outcome, if the step is reusable.
+
+        A dict record may hold a `TestResult` (from `bsag.steps.gradescope`) the step added to the results as `test`,
+        which is saved as its index in the results rather than a second copy.
+        """
+        key = self.current_step_logs.reuse_key
+        if key is not None:
+            self.step_records[key] = record
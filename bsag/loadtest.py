@@ -0,0 +1,289 @@
+"""Load generator for capacity planning: grades many synthetic submissions at once, as around a deadline."""
+
+import json
+import math
+import random
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, ArgumentTypeError
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from bsag.steps.gradescope import (
+    Assignment,
+    AssignmentUser,
+    PreviousSubmission,
+    Results,
+    SubmissionMetadata,
+    SubmissionMethodEnum,
+    TestCaseStatusEnum,
+    TestResult,
+    User,
+)
+
+METADATA_FILE = "submission_metadata.json"
+SUBMISSION_DIR = "submission"
+TIMINGS_FILE = "timings.json"
+LOG_FILE = "bsag.log"
+# Chance that each test of a synthetic previous result passed
+PREVIOUS_PASS_RATE = 0.7
+
+
+@dataclass
+class LoadProfile:
+    """Shape of the synthetic submissions."""
+
+    users: int = 1
+    extension_rate: float = 0.1
+    """Fraction of submissions whose users have an extended due date."""
+    extension_days: int = 3
+    tests_per_result: int = 20
+    burst_minutes: float = 60
+    """Mean time before the deadline that submissions are made, exponentially distributed."""
+
+
+@dataclass
+class LoadRun:
+    index: int
+    run_dir: Path
+    history: int
+    exit_code: int | None = None
+    latency: float = 0
+    steps: list[dict[str, Any]] = field(default_factory=list)
+
+
+def synthesize_metadata(rng: random.Random, index: int, history: int, profile: LoadProfile) -> SubmissionMetadata:
+    release = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    due = release + timedelta(days=7)
+    assignment = Assignment(
+        due_date=due,
+        group_size=profile.users,
+        group_submission=profile.users > 1,
+        id=1,
+        course_id=1,
+        late_due_date=due + timedelta(days=2),
+        release_date=release,
+        title="Load Test",
+        total_points=profile.tests_per_result,
+    )
+
+    extension: AssignmentUser | None = None
+    if rng.random() < profile.extension_rate:
+        extended_due = due + timedelta(days=profile.extension_days)
+        extension = AssignmentUser(release_date=release, due_date=extended_due, late_due_date=extended_due)
+    users = [
+        User(email=f"student{index}-{u}@example.edu", id=index * profile.users + u, name=f"Student {index}-{u}")
+        for u in range(profile.users)
+    ]
+    for user in users:
+        user.assignment = extension
+
+    created_at = due - timedelta(minutes=rng.expovariate(1 / profile.burst_minutes))
+    previous = []
+    submission_time = created_at
+    for _ in range(history):
+        # Earlier submissions, spaced further apart the longer before the deadline
+        submission_time -= timedelta(minutes=rng.expovariate(1 / 10))
+        tests = [
+            TestResult(
+                name=f"Test {t}",
+                score=float(passed := rng.random() < PREVIOUS_PASS_RATE),
+                max_score=1,
+                status=TestCaseStatusEnum.PASSED if passed else TestCaseStatusEnum.FAILED,
+                output="ok" if passed else "Expected 1 but got 2",
+            )
+            for t in range(profile.tests_per_result)
+        ]
+        score = sum(t.score or 0 for t in tests)
+        previous.append(
+            PreviousSubmission(submission_time=submission_time, score=score, result=Results(score=score, tests=tests))
+        )
+    previous.reverse()
+
+    return SubmissionMetadata(
+        id=index,
+        created_at=created_at,
+        assignment=assignment,
+        submission_method=SubmissionMethodEnum.UPLOAD,
+        users=users,
+        previous_submissions=previous,
+    )
+
+
+def prepare_runs(
+    work_dir: Path,
+    runs: int,
+    histories: list[int],
+    profile: LoadProfile,
+    template: Path | None,
+    seed: int,
+) -> list[LoadRun]:
+    """Creates a directory per run holding its metadata and a copy of the template submission."""
+    rng = random.Random(seed)
+    load_runs = []
+    for i in range(runs):
+        run_dir = work_dir / f"run-{i:05d}"
+        if run_dir.exists():
+            shutil.rmtree(run_dir)
+        run_dir.mkdir(parents=True)
+        # Cycle through history lengths, so each is measured under the same load
+        history = histories[i % len(histories)]
+        metadata = synthesize_metadata(rng, i, history, profile)
+        (run_dir / METADATA_FILE).write_text(metadata.json(by_alias=True), encoding="utf-8")
+        if template is not None:
+            shutil.copytree(template, run_dir / SUBMISSION_DIR, symlinks=True)
+        else:
+            (run_dir / SUBMISSION_DIR).mkdir()
+        load_runs.append(LoadRun(i, run_dir, history))
+    return load_runs
+
+
+def grade(load_run: LoadRun, bsag_command: list[str], bsag_args: list[str]) -> LoadRun:
+    start = time.perf_counter()
+    with (load_run.run_dir / LOG_FILE).open("w", encoding="utf-8") as log:
+        process = subprocess.run(
+            [*bsag_command, *bsag_args, "--timings", TIMINGS_FILE],
+            cwd=load_run.run_dir,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            check=False,
+        )
+    load_run.latency = time.perf_counter() - start
+    load_run.exit_code = process.returncode
+    try:
+        with (load_run.run_dir / TIMINGS_FILE).open(encoding="utf-8") as f:
+            load_run.steps = json.load(f)["steps"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return load_run
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of non-empty `values`."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(load_runs: list[LoadRun], elapsed: float, concurrency: int) -> dict[str, Any]:
+    latencies = [r.latency for r in load_runs]
+    latency_summary = {f"p{p}": percentile(latencies, p) for p in (50, 90, 95, 99)}
+
+    # Steps are keyed by position too, as a config may run the same step several times
+    step_durations: dict[str, dict[int, list[float]]] = defaultdict(lambda: defaultdict(list))
+    by_history: dict[int, list[float]] = defaultdict(list)
+    for r in load_runs:
+        by_history[r.history].append(r.latency)
+        for i, step in enumerate(r.steps):
+            if step["duration"] is not None:
+                step_durations[f"{i:02d} {step['name']}"][r.history].append(step["duration"])
+
+    return {
+        "runs": len(load_runs),
+        "failed": sum(r.exit_code != 0 for r in load_runs),
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "throughput_per_minute": len(load_runs) / elapsed * 60,
+        "latency": latency_summary | {"max": max(latencies)},
+        "latency_p50_by_history": {h: statistics.median(v) for h, v in sorted(by_history.items())},
+        "step_p50_by_history": {
+            step: {h: statistics.median(v) for h, v in sorted(durations.items())}
+            for step, durations in step_durations.items()
+        },
+    }
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    latency = summary["latency"]
+    lines = [
+        f"Graded {summary['runs']} submissions ({summary['failed']} failed) with {summary['concurrency']} at once"
+        f" in {summary['elapsed']:.1f}s: {summary['throughput_per_minute']:.1f} per minute",
+        "Latency (s): " + ", ".join(f"{k} {v:.3f}" for k, v in latency.items()),
+        "",
+    ]
+
+    histories = list(summary["latency_p50_by_history"])
+    header = ["step"] + [f"history={h}" for h in histories]
+    rows = [["(whole run)"] + [f"{summary['latency_p50_by_history'][h]:.4f}" for h in histories]]
+    for step, durations in summary["step_p50_by_history"].items():
+        rows.append([step] + [f"{durations[h]:.4f}" if h in durations else "-" for h in histories])
+    widths = [max(len(row[c]) for row in [header, *rows]) for c in range(len(header))]
+    lines.append("Median seconds by previous submission count:")
+    for row in [header, *rows]:
+        cells = [
+            cell.ljust(w) if c == 0 else cell.rjust(w) for c, (cell, w) in enumerate(zip(row, widths, strict=True))
+        ]
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        msg = f"must be at least 1, not {number}"
+        raise ArgumentTypeError(msg)
+    return number
+
+
+def loadtest_main(argv: list[str]) -> None:
+    parser = ArgumentParser(
+        prog="bsag loadtest",
+        description="Grade many synthetic submissions concurrently and report throughput and latency",
+        epilog=(
+            f"Each run's working directory holds `{METADATA_FILE}` and a `{SUBMISSION_DIR}` directory, so the config"
+            " should refer to them by relative paths. Arguments after `--` are passed to every BSAG run."
+        ),
+    )
+    parser.add_argument("--config", required=True, help="Path to the config file to grade with")
+    parser.add_argument("--work-dir", default="bsag-loadtest", help="Directory to create the runs in")
+    parser.add_argument("--submission", metavar="DIR", help="Template submission copied into every run")
+    parser.add_argument(
+        "--bsag-command",
+        default=f"{shlex.quote(sys.executable)} -m bsag",
+        help="Command that runs BSAG in each run's directory, e.g. a script calling `bsag.main` with custom steps",
+    )
+    parser.add_argument("--runs", type=_positive_int, default=50, help="Number of submissions to grade")
+    parser.add_argument("--concurrency", type=_positive_int, default=4, help="Number of submissions graded at once")
+    parser.add_argument(
+        "--history",
+        type=int,
+        nargs="+",
+        default=[0, 10, 100],
+        metavar="N",
+        help="Previous submission counts, cycled through across runs",
+    )
+    parser.add_argument("--users", type=int, default=1, help="Users per submission")
+    parser.add_argument("--extension-rate", type=float, default=0.1, help="Fraction of submissions with extensions")
+    parser.add_argument("--tests-per-result", type=int, default=20, help="Tests in each previous result")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic metadata")
+    parser.add_argument("--report", metavar="PATH", help="Also write the summary to PATH as JSON")
+    parser.add_argument("bsag_args", nargs="*", help="Extra arguments for BSAG, after `--`")
+    args = parser.parse_args(argv)
+
+    profile = LoadProfile(
+        users=args.users,
+        extension_rate=args.extension_rate,
+        tests_per_result=args.tests_per_result,
+    )
+    template = Path(args.submission).resolve() if args.submission else None
+    load_runs = prepare_runs(Path(args.work_dir), args.runs, args.history, profile, template, args.seed)
+    bsag_command = shlex.split(args.bsag_command)
+    bsag_args = ["--config", str(Path(args.config).resolve()), *args.bsag_args]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        # All submissions arrive at once and queue for a grader, as in a deadline burst
+        list(executor.map(lambda r: grade(r, bsag_command, bsag_args), load_runs))
+    summary = summarize(load_runs, time.perf_counter() - start, args.concurrency)
+
+    print(format_summary(summary))
+    if args.report:
+        with Path(args.report).open("w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
@@ -1,4 +1,6 @@
+from .benchmark import Benchmark
 from .display_message import DisplayMessage
+from .manifest import BuildManifest
 from .run_command import RunCommand
 
-__all__ = ["DisplayMessage", "RunCommand"]
+__all__ = ["Benchmark", "BuildManifest", "DisplayMessage", "RunCommand"]
@@ -0,0 +1,245 @@
+import math
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from subprocess import list2cmdline
+from typing import Any, Literal
+
+from pydantic import BaseModel, Extra, NonNegativeInt, PositiveFloat, PositiveInt, validator
+
+from bsag import BaseStepConfig, BaseStepDefinition
+from bsag.bsagio import BSAGIO
+from bsag.steps.gradescope import (
+    RESULTS_KEY,
+    LeaderboardEntry,
+    OutputFormatEnum,
+    Results,
+    TestCaseStatusEnum,
+    TestResult,
+    VisibilityEnum,
+)
+from bsag.utils.subprocesses import SubprocessResult, run_measured_subprocess
+
+# Sizes whose CPU time, net of the baseline, is within this many MADs of zero are too close to noise to fit
+NOISE_MADS = 3
+MIN_FIT_SIZES = 2
+
+
+class GrowthThreshold(BaseModel, extra=Extra.forbid):
+    max_exponent: float
+    points: float
+
+
+class BenchmarkConfig(BaseStepConfig):
+    display_name: str = "Benchmark"
+    # `{n}` is replaced with each input size, in the command string or in every argument
+    command: str | list[str]
+    shell: bool = False
+    working_dir: Path | None = None
+    sizes: list[PositiveInt]
+    warmup: NonNegativeInt = 1
+    trials: PositiveInt = 5
+    trial_timeout: PositiveFloat | None = None
+    # Measured like a size and subtracted from every size, e.g. the program at n=0 to discount JVM startup
+    baseline_command: str | list[str] | None = None
+    # Points of the best threshold the fitted exponent is within; without thresholds, only results are reported
+    thresholds: list[GrowthThreshold] = []
+    leaderboard: str | None = None
+    leaderboard_order: Literal["asc", "desc"] = "asc"
+    output_visibility: VisibilityEnum | None = None
+    # Lets `gradescope.incremental_regrade` replay this step's result instead of running it
+    reusable: bool = False
+
+    @validator("sizes")
+    # pylint: disable-next=no-self-argument
+    def sizes_distinct(cls, sizes: list[PositiveInt]) -> list[PositiveInt]:
+        if len(set(sizes)) < MIN_FIT_SIZES:
+            msg = f"at least {MIN_FIT_SIZES} distinct sizes are needed to fit a growth rate"
+            raise ValueError(msg)
+        return sorted(set(sizes))
+
+
+@dataclass
+class SizeTiming:
+    size: int
+    median: float
+    """Median CPU seconds of the trials, net of the baseline."""
+    mad: float
+    """Median absolute deviation of the trials, combined with that of the baseline, in seconds."""
+
+    @property
+    def above_noise(self) -> bool:
+        return self.median > NOISE_MADS * self.mad
+
+
+class BenchmarkFailure(Exception):
+    """Raised with a student-facing explanation when no growth rate can be measured."""
+
+
+def fit_growth_exponent(timings: list[SizeTiming]) -> float:
+    """Least-squares slope of log(time) against log(size); about k for a program running in Θ(n^k).
+
+    All times must be positive; leave out sizes that are not `above_noise`.
+    """
+    xs = [math.log(t.size) for t in timings]
+    ys = [math.log(t.median) for t in timings]
+    x_mean = statistics.fmean(xs)
+    y_mean = statistics.fmean(ys)
+    num = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys, strict=True))
+    den = sum((x - x_mean) ** 2 for x in xs)
+    return num / den
+
+
+class Benchmark(BaseStepDefinition[BenchmarkConfig]):
+    """Times a command across input sizes by CPU time and grades its empirical growth rate."""
+
+    @staticmethod
+    def name() -> str:
+        return "common.benchmark"
+
+    @classmethod
+    def display_name(cls, config: BenchmarkConfig) -> str:
+        return config.display_name
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: BenchmarkConfig) -> bool:
+        results: Results = bsagio.data[RESULTS_KEY]
+        max_score = max((t.points for t in config.thresholds), default=None)
+        test_result = TestResult(name=config.display_name, max_score=max_score, output_format=OutputFormatEnum.MD)
+        if config.output_visibility:
+            test_result.visibility = config.output_visibility
+
+        leaderboard_entry: LeaderboardEntry | None = None
+        try:
+            timings = cls._measure(bsagio, config)
+            exponent = cls._fit(timings)
+        except BenchmarkFailure as e:
+            test_result.output = str(e)
+            test_result.status = TestCaseStatusEnum.FAILED
+            if max_score is not None:
+                test_result.score = 0
+            passed = False
+        else:
+            bsagio.private.debug(f"Fitted growth exponent: {exponent:.3f}")
+            test_result.output = f"Estimated growth rate: about n^{exponent:.2f}\n\n" + cls._format_timings(timings)
+            cls._score(test_result, config, exponent)
+            if config.leaderboard:
+                # Time at the largest size, where the program's own growth dominates startup costs
+                leaderboard_entry = LeaderboardEntry(
+                    name=config.leaderboard, value=timings[-1].median, order=config.leaderboard_order
+                )
+            passed = True
+
+        results.add_test(test_result)
+        if leaderboard_entry is not None:
+            results.leaderboard.append(leaderboard_entry)
+        bsagio.record_step(
+            {
+                "passed": passed,
+                "test": test_result,
+                "leaderboard": leaderboard_entry.dict() if leaderboard_entry else None,
+            }
+        )
+        return passed
+
+    @classmethod
+    def _measure(cls, bsagio: BSAGIO, config: BenchmarkConfig) -> list[SizeTiming]:
+        """Times every size, raising `BenchmarkFailure` if any run fails."""
+        baseline = 0.0
+        baseline_mad = 0.0
+        if config.baseline_command is not None:
+            cpu_times = cls._time_command(bsagio, config, config.baseline_command, "the baseline")
+            baseline = statistics.median(cpu_times)
+            baseline_mad = statistics.median(abs(t - baseline) for t in cpu_times)
+            bsagio.private.debug(f"Baseline: median {baseline:.4f}s, MAD {baseline_mad:.4f}s")
+
+        timings: list[SizeTiming] = []
+        for size in config.sizes:
+            command = cls._substitute_size(config.command, size)
+            cpu_times = cls._time_command(bsagio, config, command, f"n={size}")
+            raw_median = statistics.median(cpu_times)
+            mad = statistics.median(abs(t - raw_median) for t in cpu_times)
+            timing = SizeTiming(size, raw_median - baseline, math.hypot(mad, baseline_mad))
+            timings.append(timing)
+            bsagio.private.debug(f"n={size}: median {timing.median:.4f}s, MAD {timing.mad:.4f}s")
+        return timings
+
+    @classmethod
+    def _fit(cls, timings: list[SizeTiming]) -> float:
+        fit_timings = [t for t in timings if t.above_noise]
+        if len(fit_timings) < MIN_FIT_SIZES:
+            msg = (
+                f"Only {len(fit_timings)} of the sizes took measurably longer than the baseline, so no growth rate can"
+                " be estimated. Please let the course staff know; the benchmark needs larger sizes.\n\n"
+                + cls._format_timings(timings)
+            )
+            raise BenchmarkFailure(msg)
+        return fit_growth_exponent(fit_timings)
+
+    @staticmethod
+    def _score(test_result: TestResult, config: BenchmarkConfig, exponent: float) -> None:
+        test_result.status = TestCaseStatusEnum.PASSED
+        if test_result.max_score is None:
+            return
+        test_result.score = max((t.points for t in config.thresholds if exponent <= t.max_exponent), default=0)
+        if test_result.score < test_result.max_score:
+            test_result.status = TestCaseStatusEnum.FAILED
+
+    @classmethod
+    def reusable(cls, config: BenchmarkConfig) -> bool:
+        return config.reusable
+
+    @classmethod
+    def replay(cls, bsagio: BSAGIO, _config: BenchmarkConfig, record: dict[str, Any]) -> bool:
+        results: Results = bsagio.data[RESULTS_KEY]
+        test = record["test"]
+        # Records written by earlier versions hold the test's fields
+        results.add_test(test if isinstance(test, TestResult) else TestResult.parse_obj(test))
+        if record["leaderboard"] is not None:
+            results.leaderboard.append(LeaderboardEntry.parse_obj(record["leaderboard"]))
+        return bool(record["passed"])
+
+    @staticmethod
+    def _substitute_size(command: str | list[str], size: int) -> str | list[str]:
+        if isinstance(command, str):
+            return command.replace("{n}", str(size))
+        return [arg.replace("{n}", str(size)) for arg in command]
+
+    @classmethod
+    def _time_command(
+        cls, bsagio: BSAGIO, config: BenchmarkConfig, command: str | list[str], where: str
+    ) -> list[float]:
+        """Returns the CPU times of the trials, raising `BenchmarkFailure` if a run fails."""
+        bsagio.private.debug("\n" + (command if isinstance(command, str) else list2cmdline(command)))
+
+        cpu_times: list[float] = []
+        for i in range(config.warmup + config.trials):
+            output = run_measured_subprocess(
+                command, cwd=config.working_dir, timeout=config.trial_timeout, shell=config.shell
+            )
+            if output.timed_out or output.return_code != 0:
+                raise BenchmarkFailure(cls._format_failure(config, where, output))
+            if i >= config.warmup:
+                assert output.cpu_time is not None
+                cpu_times.append(output.cpu_time)
+        return cpu_times
+
+    @staticmethod
+    def _format_timings(timings: list[SizeTiming]) -> str:
+        lines = [
+            "| n | median CPU time (s) | MAD (s) | fitted |",
+            "|---:|---:|---:|:---:|",
+        ]
+        lines += [
+            f"| {t.size} | {t.median:.4f} | {t.mad:.4f} | {'yes' if t.above_noise else 'no, within noise'} |"
+            for t in timings
+        ]
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_failure(config: BenchmarkConfig, where: str, output: SubprocessResult) -> str:
+        if output.timed_out:
+            reason = f"timed out after {config.trial_timeout} seconds"
+        else:
+            reason = f"exited with code {output.return_code}"
+        return f"The benchmark at {where} {reason}.\n\n```\n{output.output}\n```"
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from pydantic import DirectoryPath, PositiveInt
+
+from bsag import BaseStepConfig, BaseStepDefinition
+from bsag.bsagio import BSAGIO
+from bsag.utils.manifest import MANIFEST_KEY, SubmissionManifest
+
+
+class ManifestConfig(BaseStepConfig):
+    submission_dir: DirectoryPath = Path("/autograder/submission")
+    hash_contents: bool = True
+    hash_workers: PositiveInt | None = None
+
+
+class BuildManifest(BaseStepDefinition[ManifestConfig]):
+    @staticmethod
+    def name() -> str:
+        return "common.manifest"
+
+    @classmethod
+    def display_name(cls, _config: ManifestConfig) -> str:
+        return "Submission Files"
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: ManifestConfig) -> bool:
+        manifest = SubmissionManifest.build(config.submission_dir, config.hash_contents, config.hash_workers)
+        bsagio.data[MANIFEST_KEY] = manifest
+        bsagio.private.debug(f"Submission has {len(manifest)} files, {manifest.total_size} bytes in total")
+        return True
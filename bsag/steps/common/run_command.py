@@ -1,24 +1,135 @@
 from pathlib import Path
 from subprocess import list2cmdline
+from typing import Any, TypeGuard, cast
 
-from pydantic import PositiveInt
+from pydantic import BaseModel, Extra, PositiveInt, validator
 
 from bsag import BaseStepConfig, BaseStepDefinition
 from bsag.bsagio import BSAGIO
 from bsag.steps.gradescope import RESULTS_KEY, OutputFormatEnum, Results, TestCaseStatusEnum, TestResult, VisibilityEnum
-from bsag.utils.subprocesses import run_subprocess
+from bsag.utils.artifact_cache import ArtifactCache
+from bsag.utils.subprocesses import SubprocessResult, run_pipeline, run_subprocess
+from bsag.utils.workdirs import CloneMode, clone_tree, remove_tree_async
 
 
-class RunCommandConfig(BaseStepConfig):
+class ArtifactCacheConfig(BaseModel, extra=Extra.forbid):
+    # Paths are relative to the command's working directory; inputs may also be absolute, e.g. staff support jars
+    inputs: list[str]
+    outputs: list[str]
+    directory: Path = Path("/tmp/bsag-artifacts")
+    max_size_mb: PositiveInt | None = None
+    # Only safe if later steps never rewrite the restored outputs in place
+    hardlink: bool = False
+
+    @validator("outputs", each_item=True)
+    # pylint: disable-next=no-self-argument
+    def outputs_in_working_dir(cls, output: str) -> str:
+        path = Path(output)
+        if path.is_absolute() or ".." in path.parts:
+            msg = f"output `{output}` must be a path inside the working directory"
+            raise ValueError(msg)
+        return output
+
+
+class CommandOutputConfig(BaseStepConfig):
+    """Settings shared by steps that run a command and report its output as a test."""
+
     display_name: str = "No Name"
-    command: str | list[str]
     working_dir: Path | None = None
     command_timeout: PositiveInt | None = None
     points: float | None = None
     show_output: bool = True
     output_visibility: VisibilityEnum | None = None
     output_format: OutputFormatEnum | None = None
+
+
+class RunCommandConfig(CommandOutputConfig):
+    # A list of argument lists is a pipeline, each command's stdout piped into the next one's stdin
+    command: str | list[str] | list[list[str]]
     shell: bool = False
+    cache: ArtifactCacheConfig | None = None
+    # Run in a throwaway clone of the working directory, so files written by the command don't leak into other steps
+    isolate: CloneMode | None = None
+    # Lets `gradescope.incremental_regrade` replay this step's result instead of running it. Only set this if no later
+    # step depends on the command's side effects, such as files it writes.
+    reusable: bool = False
+
+    @validator("shell")
+    # pylint: disable-next=no-self-argument
+    def shell__not_with_pipeline(cls, shell: bool, values: dict[str, Any]) -> bool:
+        command = values.get("command")
+        if shell and isinstance(command, list) and command and isinstance(command[0], list):
+            msg = "`shell` cannot be used with a pipeline of commands; pipe them in a single shell command instead"
+            raise ValueError(msg)
+        return shell
+
+    @validator("command")
+    # pylint: disable-next=no-self-argument
+    def command_not_empty(cls, command: str | list[str] | list[list[str]]) -> str | list[str] | list[list[str]]:
+        if not command or (isinstance(command[0], list) and not all(command)):
+            msg = "command and every stage of a pipeline must not be empty"
+            raise ValueError(msg)
+        return command
+
+    @validator("isolate")
+    # pylint: disable-next=no-self-argument
+    def cache__isolate_mutually_exclusive(
+        cls,
+        isolate: CloneMode | None,
+        values: dict[str, Any],
+    ) -> CloneMode | None:
+        if isolate is not None and values.get("cache") is not None:
+            msg = "`cache` and `isolate` cannot both be set, as isolated outputs are discarded"
+            raise ValueError(msg)
+        return isolate
+
+
+def record_command_result(bsagio: BSAGIO, config: CommandOutputConfig, output: SubprocessResult) -> bool:
+    """Adds the outcome of a command as a test to the results. Returns whether the command passed."""
+    results: Results = bsagio.data[RESULTS_KEY]
+
+    test_result = TestResult(name=config.display_name, max_score=config.points)
+    passed = True
+
+    if output.timed_out:
+        # bsagio.student.error(f"Command timed out after {config.command_timeout} seconds.")
+        passed = False
+
+    if not passed or output.return_code != 0:
+        test_result.status = TestCaseStatusEnum.FAILED
+        if config.points is not None:
+            test_result.score = 0
+        passed = False
+    else:
+        test_result.status = TestCaseStatusEnum.PASSED
+        if config.points is not None:
+            test_result.score = config.points
+
+    if config.show_output:
+        test_result.output = output.output
+        if output.timed_out:
+            test_result.output += f"\n------------\nTimed out after {config.command_timeout} seconds."
+        elif output.return_code != 0 and output.stage_return_codes is not None:
+            codes = ", ".join(str(code) for code in output.stage_return_codes)
+            test_result.output += f"\n------------\nExit codes of each command: {codes}"
+        if config.output_format:
+            test_result.output_format = config.output_format
+        if config.output_visibility:
+            test_result.visibility = config.output_visibility
+        results.add_test(test_result)
+
+    bsagio.record_step({"passed": passed, "test": test_result if config.show_output else None})
+    return passed
+
+
+def replay_command_result(bsagio: BSAGIO, record: dict[str, Any]) -> bool:
+    """Counterpart of `record_command_result` for steps replaying a previous run's record."""
+    results: Results = bsagio.data[RESULTS_KEY]
+    test = record["test"]
+    if test is not None:
+        # Records written by earlier versions hold the test's fields
+        results.add_test(test if isinstance(test, TestResult) else TestResult.parse_obj(test))
+    return bool(record["passed"])
 
 
 class RunCommand(BaseStepDefinition[RunCommandConfig]):
@@ -32,46 +143,100 @@ class RunCommand(BaseStepDefinition[RunCommandConfig]):
 
     @classmethod
     def run(cls, bsagio: BSAGIO, config: RunCommandConfig) -> bool:
-        results: Results = bsagio.data[RESULTS_KEY]
-
         bsagio.private.debug(f"Working directory: {config.working_dir}")
         if isinstance(config.command, str):
             bsagio.private.debug("\n" + config.command)
+        elif cls._is_pipeline(config.command):
+            bsagio.private.debug("\n" + " | ".join(list2cmdline(stage) for stage in config.command))
         else:
-            bsagio.private.debug("\n" + list2cmdline(config.command))
+            bsagio.private.debug("\n" + list2cmdline(cast(list[str], config.command)))
 
-        output = run_subprocess(
+        cache: ArtifactCache | None = None
+        cache_key = ""
+        output: SubprocessResult | None = None
+        if config.cache:
+            try:
+                cache, cache_key = cls._open_cache(config)
+                output = cls._fetch_cached(bsagio, config, cache, cache_key)
+            except (OSError, ValueError, KeyError) as e:
+                # As when storing, a broken cache must not fail grading; just run the command
+                bsagio.private.warning(f"Could not use artifact cache: {e}")
+                cache = None
+        if output is None:
+            output = cls._run_subprocess(bsagio, config)
+            if cache and output.return_code == 0 and not output.timed_out:
+                cls._store_cached(bsagio, config, cache, cache_key, output)
+
+        return record_command_result(bsagio, config, output)
+
+    @classmethod
+    def reusable(cls, config: RunCommandConfig) -> bool:
+        return config.reusable
+
+    @classmethod
+    def replay(cls, bsagio: BSAGIO, _config: RunCommandConfig, record: dict[str, Any]) -> bool:
+        return replay_command_result(bsagio, record)
+
+    @staticmethod
+    def _is_pipeline(command: str | list[str] | list[list[str]]) -> TypeGuard[list[list[str]]]:
+        # A TypeGuard doesn't narrow the negative branch, so callers cast the command there
+        return isinstance(command, list) and isinstance(command[0], list)
+
+    @classmethod
+    def _run_subprocess(cls, bsagio: BSAGIO, config: RunCommandConfig) -> SubprocessResult:
+        if config.isolate is None:
+            return cls._run_in(bsagio, config, config.working_dir)
+
+        isolated_dir = clone_tree(config.working_dir or Path.cwd(), config.isolate)
+        bsagio.private.debug(f"Isolated working directory: {isolated_dir}")
+        try:
+            return cls._run_in(bsagio, config, isolated_dir)
+        finally:
+            remove_tree_async(isolated_dir)
+
+    @classmethod
+    def _run_in(cls, bsagio: BSAGIO, config: RunCommandConfig, cwd: Path | None) -> SubprocessResult:
+        if cls._is_pipeline(config.command):
+            output = run_pipeline(config.command, cwd=cwd, timeout=config.command_timeout)
+            bsagio.private.debug(f"Exit codes of each command: {output.stage_return_codes}")
+            return output
+
+        command = cast(str | list[str], config.command)
+        return run_subprocess(command, cwd=cwd, timeout=config.command_timeout, shell=config.shell)
+
+    @classmethod
+    def _open_cache(cls, config: RunCommandConfig) -> tuple[ArtifactCache, str]:
+        assert config.cache is not None
+        max_bytes = None if config.cache.max_size_mb is None else config.cache.max_size_mb * 1024 * 1024
+        cache = ArtifactCache(config.cache.directory, max_bytes=max_bytes, allow_hardlink=config.cache.hardlink)
+        # Inputs are hashed before running, in case the command modifies them
+        key = ArtifactCache.compute_key(
             config.command,
-            cwd=config.working_dir,
-            timeout=config.command_timeout,
+            config.cache.inputs,
+            config.cache.outputs,
+            config.working_dir or Path.cwd(),
             shell=config.shell,
         )
+        return cache, key
 
-        test_result = TestResult(name=config.display_name, max_score=config.points)
-        passed = True
+    @classmethod
+    def _fetch_cached(
+        cls, bsagio: BSAGIO, config: RunCommandConfig, cache: ArtifactCache, key: str
+    ) -> SubprocessResult | None:
+        cached_output = cache.fetch(key, config.working_dir or Path.cwd())
+        if cached_output is None:
+            bsagio.private.debug(f"Artifact cache miss: {key}")
+            return None
+        bsagio.private.debug(f"Artifact cache hit, outputs restored without running: {key}")
+        return SubprocessResult(cached_output, None, 0, False)
 
-        if output.timed_out:
-            # bsagio.student.error(f"Command timed out after {config.command_timeout} seconds.")
-            passed = False
-
-        if not passed or output.return_code != 0:
-            test_result.status = TestCaseStatusEnum.FAILED
-            if config.points is not None:
-                test_result.score = 0
-            passed = False
-        else:
-            test_result.status = TestCaseStatusEnum.PASSED
-            if config.points is not None:
-                test_result.score = config.points
-
-        if config.show_output:
-            test_result.output = output.output
-            if output.timed_out:
-                test_result.output += f"\n------------\nTimed out after {config.command_timeout} seconds."
-            if config.output_format:
-                test_result.output_format = config.output_format
-            if config.output_visibility:
-                test_result.visibility = config.output_visibility
-            results.tests.append(test_result)
-
-        return passed
+    @classmethod
+    def _store_cached(
+        cls, bsagio: BSAGIO, config: RunCommandConfig, cache: ArtifactCache, key: str, output: SubprocessResult
+    ) -> None:
+        assert config.cache is not None
+        try:
+            cache.store(key, config.cache.outputs, config.working_dir or Path.cwd(), output.output)
+        except OSError as e:
+            # The cache is an optimization; a full disk or permissions issue must not fail grading
+            bsagio.private.warning(f"Could not store outputs in artifact cache: {e}")
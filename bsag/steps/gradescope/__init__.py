@@ -1,7 +1,14 @@
+from ._previous import SUBMISSION_HASH_KEY
 from ._types import (
+    CONFIG_HASH_EXTRA,
     METADATA_KEY,
     RESULTS_KEY,
+    STEP_LOG_TESTS_EXTRA,
+    STEP_RECORDS_EXTRA,
+    SUBMISSION_HASH_EXTRA,
+    UNPENALIZED_SCORE_EXTRA,
     Assignment,
+    AssignmentUser,
     LeaderboardEntry,
     OutputFormatEnum,
     PreviousSubmission,
@@ -13,15 +20,24 @@ from ._types import (
     User,
     VisibilityEnum,
 )
+from .incremental_regrade import IncrementalRegrade
 from .lateness import Lateness
 from .limit_velocity import LimitVelocity
 from .results import WriteResults
+from .skip_resubmission import SkipResubmission
 from .submission_metadata import ReadSubMetadata
 
 __all__ = [
+    "CONFIG_HASH_EXTRA",
     "METADATA_KEY",
     "RESULTS_KEY",
+    "STEP_LOG_TESTS_EXTRA",
+    "STEP_RECORDS_EXTRA",
+    "SUBMISSION_HASH_EXTRA",
+    "SUBMISSION_HASH_KEY",
+    "UNPENALIZED_SCORE_EXTRA",
     "Assignment",
+    "AssignmentUser",
     "LeaderboardEntry",
     "OutputFormatEnum",
     "PreviousSubmission",
@@ -36,4 +52,6 @@ __all__ = [
     "LimitVelocity",
     "WriteResults",
     "ReadSubMetadata",
+    "SkipResubmission",
+    "IncrementalRegrade",
 ]
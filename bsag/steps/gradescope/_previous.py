@@ -0,0 +1,54 @@
+from pathlib import Path
+from typing import Any
+
+from bsag.bsagio import BSAGIO
+from bsag.utils.hashing import hash_tree
+from bsag.utils.manifest import MANIFEST_KEY, SubmissionManifest
+
+from ._types import CONFIG_HASH_EXTRA, STEP_RECORDS_EXTRA, SUBMISSION_HASH_EXTRA, PreviousSubmission, Results
+
+SUBMISSION_HASH_KEY = "gs_submission_hash"
+"""Created by the first of `gradescope.skip_resubmission` or `gradescope.incremental_regrade` to run.
+
+Type: `str`, hash of the names and contents of all submitted files
+"""
+
+
+def get_submission_hash(bsagio: BSAGIO, submission_dir: Path, max_workers: int | None) -> str:
+    if SUBMISSION_HASH_KEY not in bsagio.data:
+        manifest: SubmissionManifest | None = bsagio.data.get(MANIFEST_KEY)
+        if manifest is not None and manifest.hashed and manifest.root.resolve() == submission_dir.resolve():
+            bsagio.data[SUBMISSION_HASH_KEY] = manifest.digest()
+        else:
+            bsagio.data[SUBMISSION_HASH_KEY] = hash_tree(submission_dir, max_workers=max_workers)
+        bsagio.private.debug(f"Submission hash: {bsagio.data[SUBMISSION_HASH_KEY]}")
+    submission_hash: str = bsagio.data[SUBMISSION_HASH_KEY]
+    return submission_hash
+
+
+def find_identical_submission(
+    prev_subs: list[PreviousSubmission],
+    submission_hash: str,
+    config_hash: str | None = None,
+) -> PreviousSubmission | None:
+    """Returns the latest previous submission with the same files (and, if given, graded under the same config)."""
+    for prev_sub in sorted(prev_subs, key=lambda s: s.submission_time, reverse=True):
+        extra = prev_sub.result.extra_data
+        if extra.get(SUBMISSION_HASH_EXTRA) != submission_hash:
+            continue
+        if config_hash is None or extra.get(CONFIG_HASH_EXTRA) == config_hash:
+            return prev_sub
+    return None
+
+
+def load_step_records(results: Results) -> dict[str, Any]:
+    """Returns the step records saved in `results`, with tests stored by index replaced by those tests."""
+    records: dict[str, Any] = results.extra_data.get(STEP_RECORDS_EXTRA, {})
+    return {
+        key: (
+            record | {"test": results.tests[record["test"]]}
+            if isinstance(record, dict) and isinstance(record.get("test"), int)
+            else record
+        )
+        for key, record in records.items()
+    }
@@ -1,8 +1,8 @@
 from datetime import datetime
 from enum import Enum
-from typing import Literal
+from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 METADATA_KEY = "gs_submission_metadata"
 """Created by `submission_metadata`.
@@ -16,6 +16,44 @@ RESULTS_KEY = "gs_results"
 Type: `Results`, see https://gradescope-autograders.readthedocs.io/en/latest/specs/#output-format
 """
 
+SUBMISSION_HASH_EXTRA = "bsag_submission_hash"
+"""Key in `Results.extra_data`, set by `gradescope.skip_resubmission` and `gradescope.incremental_regrade`.
+
+Type: `str`, hash of the names and contents of all submitted files
+"""
+
+CONFIG_HASH_EXTRA = "bsag_config_hash"
+"""Key in `Results.extra_data`, set by `gradescope.skip_resubmission` and `gradescope.incremental_regrade`.
+
+Type: `str`, hash of the run config that graded the submission
+"""
+
+STEP_LOG_TESTS_EXTRA = "bsag_step_log_tests"
+"""Key in `Results.extra_data`, set by `gradescope.results`.
+
+Type: `list[str]`, names of the steps whose student-facing logs are the tests at the start of `Results.tests`, in
+order. Results written by earlier versions hold only the number of those tests.
+"""
+
+REPLAYED_STEP_LOGS_KEY = "gs_replayed_step_logs"
+"""Created by `gradescope.skip_resubmission` when it replays results, used by `gradescope.results`.
+
+Type: `ReplayedStepLogs`
+"""
+
+STEP_RECORDS_EXTRA = "bsag_step_records"
+"""Key in `Results.extra_data`, set by `gradescope.results`.
+
+Type: `dict[str, Any]`, records of reusable steps by reuse key, see `BSAGIO.record_step`. A record's `test` is stored
+as its index in `Results.tests`; read records with `load_step_records` to get the tests back.
+"""
+
+UNPENALIZED_SCORE_EXTRA = "bsag_unpenalized_score"
+"""Key in `Results.extra_data`, set by `gradescope.lateness` when it applies a penalty.
+
+Type: `float`, top-level score before the lateness penalty
+"""
+
 
 class VisibilityEnum(str, Enum):
     HIDDEN = "hidden"
@@ -97,15 +135,30 @@ class Results(BaseModel):
     stdout_visibility: VisibilityEnum | None = None
     tests: list[TestResult] = []
     leaderboard: list[LeaderboardEntry] = []
+    extra_data: dict[str, Any] = {}
+
+    def add_test(self, test: TestResult) -> None:
+        """Appends a test. Safe to call from several threads at once without locking, as `list.append` is atomic."""
+        self.tests.append(test)
 
     def validate_score(self) -> bool:
         return self.score is not None or (bool(self.tests) and all(t.score is not None for t in self.tests))
 
 
-class PreviousSubmission(BaseModel):
+class ReplayedStepLogs(BaseModel):
+    """Step log tests of replayed results, kept for the steps that don't run again."""
+
+    after_steps: int
+    """Number of this run's step logs that precede these tests."""
+    tests: list[tuple[str, TestResult]]
+    """Step name and step log test, in their original order."""
+
+
+class PreviousSubmission(BaseModel, allow_population_by_field_name=True):
     submission_time: datetime
     score: float = 0.0
-    result: Results = Results()
+    # Gradescope names this `results`; serialize with `by_alias=True` to match
+    result: Results = Field(Results(), alias="results")
 
 
 class SubmissionMetadata(BaseModel):
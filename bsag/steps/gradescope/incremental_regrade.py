@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from pydantic import DirectoryPath, PositiveInt
+
+from bsag import BaseStepConfig, BaseStepDefinition
+from bsag.bsagio import BSAGIO, CONFIG_HASH_KEY
+
+from ._previous import find_identical_submission, get_submission_hash, load_step_records
+from ._types import (
+    CONFIG_HASH_EXTRA,
+    METADATA_KEY,
+    RESULTS_KEY,
+    SUBMISSION_HASH_EXTRA,
+    Results,
+    SubmissionMetadata,
+)
+
+
+class IncrementalRegradeConfig(BaseStepConfig):
+    submission_dir: DirectoryPath = Path("/autograder/submission")
+    hash_workers: PositiveInt | None = None
+
+
+class IncrementalRegrade(BaseStepDefinition[IncrementalRegradeConfig]):
+    """Lets reusable steps replay their results from the last grading of identical files.
+
+    A reusable step (e.g. `common.run_command` with `reusable: true`) is only replayed if neither its config nor that
+    of any earlier non-reusable step has changed. Must run before any reusable step.
+    """
+
+    @staticmethod
+    def name() -> str:
+        return "gradescope.incremental_regrade"
+
+    @classmethod
+    def display_name(cls, _config: IncrementalRegradeConfig) -> str:
+        return "Incremental Regrade"
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: IncrementalRegradeConfig) -> bool:
+        subm_data: SubmissionMetadata = bsagio.data[METADATA_KEY]
+        res: Results = bsagio.data[RESULTS_KEY]
+
+        submission_hash = get_submission_hash(bsagio, config.submission_dir, config.hash_workers)
+        res.extra_data[SUBMISSION_HASH_EXTRA] = submission_hash
+        res.extra_data[CONFIG_HASH_EXTRA] = bsagio.data[CONFIG_HASH_KEY]
+
+        prev_sub = find_identical_submission(subm_data.previous_submissions, submission_hash)
+        if prev_sub is None:
+            bsagio.private.debug("No previous grading of identical files")
+            return True
+
+        records = load_step_records(prev_sub.result)
+        bsagio.reusable_records.update(records)
+        bsagio.private.info(f"Loaded {len(records)} step records from submission at {prev_sub.submission_time}")
+        return True
@@ -5,7 +5,7 @@ from pydantic import NonNegativeFloat, NonNegativeInt, PositiveInt, validator
 from bsag import BaseStepConfig, BaseStepDefinition
 from bsag.bsagio import BSAGIO
 
-from ._types import METADATA_KEY, RESULTS_KEY, Results, SubmissionMetadata
+from ._types import METADATA_KEY, RESULTS_KEY, UNPENALIZED_SCORE_EXTRA, Results, SubmissionMetadata
 
 
 class LatenessConfig(BaseStepConfig):
@@ -79,6 +79,7 @@ class Lateness(BaseStepDefinition[LatenessConfig]):
         if res.score is not None:
             bsagio.both.info(f"Your score on this assignment was {res.score:.3f}.")
             if res.score > 0:
+                res.extra_data[UNPENALIZED_SCORE_EXTRA] = res.score
                 res.score *= 1 - penalty
                 res.score = max(res.score, config.min_lateness_score)
                 bsagio.both.info(
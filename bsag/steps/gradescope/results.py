@@ -1,9 +1,19 @@
 from pathlib import Path
+from typing import Any
 
 from bsag import BaseStepConfig, BaseStepDefinition
 from bsag.bsagio import BSAGIO
 
-from ._types import RESULTS_KEY, Results, TestCaseStatusEnum, TestResult
+from ._types import (
+    REPLAYED_STEP_LOGS_KEY,
+    RESULTS_KEY,
+    STEP_LOG_TESTS_EXTRA,
+    STEP_RECORDS_EXTRA,
+    ReplayedStepLogs,
+    Results,
+    TestCaseStatusEnum,
+    TestResult,
+)
 
 
 class ResultsConfig(BaseStepConfig):
@@ -37,22 +47,44 @@ class WriteResults(BaseStepDefinition[ResultsConfig]):
             if test.max_score is not None:
                 test.max_score = round(test.max_score, digits)
 
-        module_logs: list[TestResult] = []
-        for log in bsagio.step_logs:
-            if not log.log_chunks:
+        module_logs: list[tuple[str, TestResult]] = []
+        replayed: ReplayedStepLogs | None = bsagio.data.get(REPLAYED_STEP_LOGS_KEY)
+        ran = {log.name for log in bsagio.step_logs}
+        for i, log in enumerate(bsagio.step_logs):
+            if replayed is not None and i == replayed.after_steps:
+                module_logs += [(name, test) for name, test in replayed.tests if name not in ran]
+            if log.is_empty():
                 continue
             module_logs.append(
-                TestResult(
-                    name=log.display_name,
-                    output="".join(log.log_chunks).strip(),
-                    score=log.score if log.score is None else round(log.score, digits),
-                    max_score=0 if log.score else None,
-                    status=TestCaseStatusEnum.PASSED if log.success else TestCaseStatusEnum.FAILED,
+                (
+                    log.name,
+                    TestResult(
+                        name=log.display_name,
+                        output=log.text().strip(),
+                        score=log.score if log.score is None else round(log.score, digits),
+                        max_score=0 if log.score else None,
+                        status=TestCaseStatusEnum.PASSED if log.success else TestCaseStatusEnum.FAILED,
+                    ),
                 )
             )
-        res.tests = module_logs + res.tests
+        res.tests = [test for _, test in module_logs] + res.tests
+        res.extra_data[STEP_LOG_TESTS_EXTRA] = [name for name, _ in module_logs]
+        records = res.extra_data.get(STEP_RECORDS_EXTRA, {}) | bsagio.step_records
+        if records:
+            # Tests are stored by index, so output-heavy tests aren't written twice
+            test_indices = {id(test): i for i, test in enumerate(res.tests)}
+            res.extra_data[STEP_RECORDS_EXTRA] = {
+                key: cls._store_test_by_index(record, test_indices) for key, record in records.items()
+            }
 
         with config.output_path.open("w") as outfile:
             outfile.write(res.json())
 
         return True
+
+    @staticmethod
+    def _store_test_by_index(record: Any, test_indices: dict[int, int]) -> Any:
+        test = record.get("test") if isinstance(record, dict) else None
+        if not isinstance(test, TestResult):
+            return record
+        return record | {"test": test_indices.get(id(test), test.dict())}
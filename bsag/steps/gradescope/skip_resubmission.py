@@ -0,0 +1,97 @@
+from pathlib import Path
+
+from pydantic import DirectoryPath, PositiveInt
+
+from bsag import BaseStepConfig, BaseStepDefinition, RunConfig
+from bsag.bsagio import BSAGIO, CONFIG_HASH_KEY
+from bsag.utils.datetimes import format_datetime
+
+from ._previous import find_identical_submission, get_submission_hash, load_step_records
+from ._types import (
+    CONFIG_HASH_EXTRA,
+    METADATA_KEY,
+    REPLAYED_STEP_LOGS_KEY,
+    RESULTS_KEY,
+    STEP_LOG_TESTS_EXTRA,
+    STEP_RECORDS_EXTRA,
+    SUBMISSION_HASH_EXTRA,
+    UNPENALIZED_SCORE_EXTRA,
+    ReplayedStepLogs,
+    Results,
+    SubmissionMetadata,
+)
+from .lateness import Lateness
+
+
+class SkipResubmissionConfig(BaseStepConfig):
+    submission_dir: DirectoryPath = Path("/autograder/submission")
+    hash_workers: PositiveInt | None = None
+    time_zone: str = "UTC"
+    time_format: str = "%a %B %d %Y, %H:%M:%S %Z"
+
+
+class SkipResubmission(BaseStepDefinition[SkipResubmissionConfig]):
+    """Replays the results of a previous, byte-identical submission graded under the same config.
+
+    Should run after `gradescope.limit_velocity`, so velocity-limited results are never recorded for replay. Teardown
+    steps still run on the replayed results, so lateness is applied to the unpenalized score of the previous results;
+    configs with `gradescope.lateness` in the execution plan are rejected, as it would be skipped or overwritten. The
+    previous student-facing step logs are kept for the steps that are skipped.
+    """
+
+    @staticmethod
+    def name() -> str:
+        return "gradescope.skip_resubmission"
+
+    @classmethod
+    def display_name(cls, _config: SkipResubmissionConfig) -> str:
+        return "Resubmission Check"
+
+    @classmethod
+    def check_plan(cls, _config: SkipResubmissionConfig, run_config: RunConfig) -> None:
+        if any(swc.name() == Lateness.name() for swc in run_config.execution_plan):
+            msg = f"`{Lateness.name()}` must be in the teardown plan, or replayed resubmissions escape its penalty"
+            raise ValueError(msg)
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: SkipResubmissionConfig) -> bool:
+        subm_data: SubmissionMetadata = bsagio.data[METADATA_KEY]
+        res: Results = bsagio.data[RESULTS_KEY]
+        config_hash: str = bsagio.data[CONFIG_HASH_KEY]
+
+        submission_hash = get_submission_hash(bsagio, config.submission_dir, config.hash_workers)
+        bsagio.private.debug(f"Config hash: {config_hash}")
+
+        prev_sub = find_identical_submission(subm_data.previous_submissions, submission_hash, config_hash)
+        if prev_sub is None:
+            res.extra_data[SUBMISSION_HASH_EXTRA] = submission_hash
+            res.extra_data[CONFIG_HASH_EXTRA] = config_hash
+            return True
+
+        sub_time = format_datetime(prev_sub.submission_time, config.time_zone, config.time_format)
+        bsagio.both.info(f"This submission is identical to your submission at {sub_time}.")
+        bsagio.both.info("Its results have been reused instead of running the autograder again.")
+
+        # The previous results already hold the tests of the steps that ran before this one
+        replayed = prev_sub.result.copy(deep=True)
+        # Tests are about to move, so records refer to them directly until `gradescope.results` saves them again
+        replayed.extra_data[STEP_RECORDS_EXTRA] = load_step_records(replayed)
+        step_log_names = replayed.extra_data.pop(STEP_LOG_TESTS_EXTRA, [])
+        if isinstance(step_log_names, int):
+            # Written without step names, so these can't be told apart from the logs of steps that run again
+            step_log_names = [None] * step_log_names
+        step_log_tests = replayed.tests[: len(step_log_names)]
+        replayed.tests = replayed.tests[len(step_log_names) :]
+        # `gradescope.results` keeps these step logs for the steps that are skipped
+        bsagio.data[REPLAYED_STEP_LOGS_KEY] = ReplayedStepLogs(
+            after_steps=len(bsagio.step_logs),
+            tests=[(name, test) for name, test in zip(step_log_names, step_log_tests, strict=True) if name is not None],
+        )
+        if UNPENALIZED_SCORE_EXTRA in replayed.extra_data:
+            replayed.score = replayed.extra_data.pop(UNPENALIZED_SCORE_EXTRA)
+        replayed.extra_data[SUBMISSION_HASH_EXTRA] = submission_hash
+        replayed.extra_data[CONFIG_HASH_EXTRA] = config_hash
+        bsagio.data[RESULTS_KEY] = replayed
+        bsagio.skip_to_teardown = True
+
+        return True
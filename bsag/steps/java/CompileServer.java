@@ -0,0 +1,135 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.File;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.net.SocketTimeoutException;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.List;
+import javax.tools.JavaCompiler;
+import javax.tools.ToolProvider;
+
+/**
+ * Long-lived compile and run server for BSAG's `java.*` steps, avoiding a JVM startup per command.
+ *
+ * <p>Prints its port on the first line of stdout, then serves one request per connection, one at a time:
+ *
+ * <pre>
+ * request:  OP \n ARG_COUNT \n ARG \n ... ARG \n     (OP is COMPILE or RUN)
+ * response: EXIT_CODE \n BYTE_COUNT \n OUTPUT_BYTES
+ * </pre>
+ *
+ * <p>COMPILE arguments are passed to javac as-is. RUN arguments are a classpath, a main class, and the program's
+ * arguments; each RUN gets a fresh class loader, so static state does not leak between runs. Relative paths resolve
+ * against the server's working directory. Exits after the idle timeout (seconds, first argument) without requests.
+ *
+ * <p>A RUN's main method must return: calling {@code System.exit} exits the server itself, losing the run's output.
+ */
+public class CompileServer {
+    public static void main(String[] args) throws IOException {
+        int idleTimeoutMillis = args.length > 0 ? Integer.parseInt(args[0]) * 1000 : 0;
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        try (ServerSocket server = new ServerSocket(0, 50, InetAddress.getLoopbackAddress())) {
+            server.setSoTimeout(idleTimeoutMillis);
+            System.out.println(server.getLocalPort());
+            System.out.flush();
+            while (true) {
+                Socket socket;
+                try {
+                    socket = server.accept();
+                } catch (SocketTimeoutException e) {
+                    return;
+                }
+                try (socket) {
+                    handle(socket, compiler);
+                } catch (IOException | RuntimeException e) {
+                    // Malformed request or the client went away; keep serving
+                }
+            }
+        }
+    }
+
+    private static void handle(Socket socket, JavaCompiler compiler) throws IOException {
+        BufferedReader in =
+                new BufferedReader(new InputStreamReader(socket.getInputStream(), StandardCharsets.UTF_8));
+        String op = in.readLine();
+        int argCount = Integer.parseInt(in.readLine());
+        List<String> args = new ArrayList<>();
+        for (int i = 0; i < argCount; i++) {
+            args.add(in.readLine());
+        }
+
+        ByteArrayOutputStream output = new ByteArrayOutputStream();
+        int exitCode;
+        if ("COMPILE".equals(op)) {
+            exitCode = compile(compiler, args, output);
+        } else if ("RUN".equals(op)) {
+            exitCode = run(args, output);
+        } else {
+            output.write(("Unknown operation: " + op + "\n").getBytes(StandardCharsets.UTF_8));
+            exitCode = 2;
+        }
+
+        byte[] body = output.toByteArray();
+        OutputStream out = socket.getOutputStream();
+        out.write((exitCode + "\n" + body.length + "\n").getBytes(StandardCharsets.UTF_8));
+        out.write(body);
+        out.flush();
+    }
+
+    private static int compile(JavaCompiler compiler, List<String> args, OutputStream output) {
+        if (compiler == null) {
+            new PrintStream(output, true, StandardCharsets.UTF_8).println("No system Java compiler available");
+            return 2;
+        }
+        return compiler.run(null, output, output, args.toArray(new String[0]));
+    }
+
+    private static int run(List<String> args, OutputStream output) throws IOException {
+        String[] classpath = args.get(0).split(File.pathSeparator);
+        String mainClass = args.get(1);
+        String[] programArgs = args.subList(2, args.size()).toArray(new String[0]);
+
+        URL[] urls = new URL[classpath.length];
+        for (int i = 0; i < classpath.length; i++) {
+            urls[i] = new File(classpath[i]).toURI().toURL();
+        }
+
+        PrintStream oldOut = System.out;
+        PrintStream oldErr = System.err;
+        InputStream oldIn = System.in;
+        PrintStream capture = new PrintStream(output, true, StandardCharsets.UTF_8);
+        System.setOut(capture);
+        System.setErr(capture);
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        try (URLClassLoader loader = new URLClassLoader(urls, ClassLoader.getPlatformClassLoader())) {
+            Class<?> cls = Class.forName(mainClass, true, loader);
+            Method main = cls.getMethod("main", String[].class);
+            main.invoke(null, (Object) programArgs);
+            return 0;
+        } catch (InvocationTargetException e) {
+            e.getCause().printStackTrace(capture);
+            return 1;
+        } catch (ReflectiveOperationException | LinkageError e) {
+            e.printStackTrace(capture);
+            return 1;
+        } finally {
+            capture.flush();
+            System.setOut(oldOut);
+            System.setErr(oldErr);
+            System.setIn(oldIn);
+        }
+    }
+}
@@ -0,0 +1,12 @@
+from ._server import JAVA_SERVER_KEY, CompileServer
+from .compile_java import JavaCompile
+from .compile_server import StartCompileServer
+from .run_java import JavaRun
+
+__all__ = [
+    "JAVA_SERVER_KEY",
+    "CompileServer",
+    "JavaCompile",
+    "JavaRun",
+    "StartCompileServer",
+]
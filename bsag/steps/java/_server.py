@@ -0,0 +1,161 @@
+import contextlib
+import hashlib
+import os
+import select
+import shutil
+import socket
+import subprocess
+import tempfile
+from pathlib import Path
+from subprocess import list2cmdline
+
+from bsag.bsagio import BSAGIO
+from bsag.utils.subprocesses import SubprocessResult, run_subprocess
+
+SERVER_SOURCE = Path(__file__).with_name("CompileServer.java")
+SERVER_CLASS = "CompileServer"
+
+JAVA_SERVER_KEY = "java_compile_server"
+"""Created by `java.compile_server`, used by `java.compile` and `java.run` when present.
+
+Type: `CompileServer`
+"""
+
+
+class CompileServerError(Exception):
+    pass
+
+
+def _build_server_classes(javac: str) -> Path:
+    """Compiles the server once per source version, shared by all graders on the host."""
+    source = SERVER_SOURCE.read_bytes()
+    classes_dir = Path(tempfile.gettempdir(), "bsag-java-server", hashlib.sha256(source).hexdigest()[:16])
+    if (classes_dir / f"{SERVER_CLASS}.class").is_file():
+        return classes_dir
+
+    classes_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=classes_dir.parent))
+    try:
+        output = run_subprocess([javac, "-d", str(staging), str(SERVER_SOURCE)], timeout=120)
+        if output.return_code != 0:
+            msg = f"Could not compile {SERVER_SOURCE.name}:\n{output.output}"
+            raise CompileServerError(msg)
+        with contextlib.suppress(OSError):
+            # Losing the race to a concurrent grader is fine; its classes are identical
+            staging.rename(classes_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return classes_dir
+
+
+class CompileServer:
+    """Client for a running `CompileServer.java` process.
+
+    Requests are only served for the server's own working directory, since a JVM cannot change directories. A request
+    returns None when the server cannot serve it, and the caller should fall back to a fresh process. Once a request is
+    sent, it is never retried: a program that calls `System.exit` takes the server down with it, so its run fails.
+    """
+
+    def __init__(self, process: subprocess.Popen[str], port: int, working_dir: Path) -> None:
+        self.process = process
+        self.port = port
+        self.working_dir = working_dir
+
+    @classmethod
+    def start(
+        cls,
+        working_dir: Path,
+        java: str = "java",
+        javac: str = "javac",
+        jvm_args: list[str] | None = None,
+        startup_timeout: float = 30,
+        idle_timeout: int = 600,
+    ) -> "CompileServer":
+        classes_dir = _build_server_classes(javac)
+        process = subprocess.Popen(
+            [java, *(jvm_args or []), "-cp", str(classes_dir), SERVER_CLASS, str(idle_timeout)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=working_dir,
+            text=True,
+            start_new_session=True,
+        )
+        assert process.stdout is not None
+        ready, _, _ = select.select([process.stdout], [], [], startup_timeout)
+        port_line = process.stdout.readline() if ready else ""
+        # Nothing reads the server's stdout after the handshake, so close it rather than let it fill up and block any
+        # thread of a student program that keeps printing outside a request; such writes now fail instead
+        process.stdout.close()
+        if not port_line.strip().isdigit():
+            process.kill()
+            process.wait()
+            msg = f"Compile server did not start within {startup_timeout} seconds"
+            raise CompileServerError(msg)
+        return cls(process, int(port_line), working_dir.resolve())
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def stop(self) -> None:
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+    def request(
+        self,
+        op: str,
+        args: list[str],
+        cwd: str | os.PathLike[str] | None,
+        timeout: int | None,
+    ) -> SubprocessResult | None:
+        if not self.alive() or Path(cwd or Path.cwd()).resolve() != self.working_dir:
+            return None
+        if any("\n" in arg for arg in args):
+            return None
+
+        payload = "\n".join([op, str(len(args)), *args]) + "\n"
+        try:
+            sock = socket.create_connection(("127.0.0.1", self.port), timeout=timeout)
+        except OSError:
+            self.stop()
+            return None
+        with sock:
+            try:
+                sock.sendall(payload.encode())
+                with sock.makefile("rb") as response:
+                    exit_code = int(response.readline())
+                    body = response.read(int(response.readline()))
+            except TimeoutError:
+                # The request is stuck inside the server, which serves one request at a time
+                self.stop()
+                return SubprocessResult("", None, -1, timed_out=True)
+            except (OSError, ValueError):
+                # The program may already have run, so running it again in a new JVM could repeat its side effects
+                self.stop()
+                msg = (
+                    "The compile server exited while handling this request, most likely because the program called"
+                    " System.exit. Its output was lost.\n"
+                )
+                return SubprocessResult(msg, None, self.process.returncode or -1, timed_out=False)
+        return SubprocessResult(body.decode(errors="replace"), None, exit_code, timed_out=False)
+
+
+def run_java_command(
+    bsagio: BSAGIO,
+    op: str,
+    server_args: list[str] | None,
+    fallback_command: list[str],
+    cwd: str | os.PathLike[str] | None,
+    timeout: int | None,
+) -> SubprocessResult:
+    """Serves the request from the compile server if one is running and able to, else runs `fallback_command`."""
+    server: CompileServer | None = bsagio.data.get(JAVA_SERVER_KEY)
+    if server is not None and server_args is not None:
+        output = server.request(op, server_args, cwd, timeout)
+        if output is not None:
+            bsagio.private.debug(f"Served {op} by compile server")
+            return output
+        bsagio.private.debug(f"Compile server unavailable for {op}, starting a new JVM")
+
+    bsagio.private.debug("\n" + list2cmdline(fallback_command))
+    return run_subprocess(fallback_command, cwd=cwd, timeout=timeout)
@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+
+from bsag import BaseStepDefinition
+from bsag.bsagio import BSAGIO
+from bsag.steps.common.run_command import CommandOutputConfig, record_command_result
+from bsag.utils.subprocesses import SubprocessResult
+
+from ._server import run_java_command
+
+
+class JavaCompileConfig(CommandOutputConfig):
+    # Glob patterns, relative to the working directory
+    sources: list[str]
+    classpath: list[str] = []
+    output_dir: str | None = None
+    javac_args: list[str] = []
+    javac: str = "javac"
+
+
+class JavaCompile(BaseStepDefinition[JavaCompileConfig]):
+    @staticmethod
+    def name() -> str:
+        return "java.compile"
+
+    @classmethod
+    def display_name(cls, config: JavaCompileConfig) -> str:
+        return config.display_name
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: JavaCompileConfig) -> bool:
+        working_dir = config.working_dir or Path.cwd()
+        sources = sorted({str(p.relative_to(working_dir)) for g in config.sources for p in working_dir.glob(g)})
+        if not sources:
+            output = SubprocessResult(f"No source files matched {config.sources}", None, 1, timed_out=False)
+            return record_command_result(bsagio, config, output)
+
+        args = list(config.javac_args)
+        if config.classpath:
+            args += ["-cp", os.pathsep.join(config.classpath)]
+        if config.output_dir:
+            args += ["-d", config.output_dir]
+        args += sources
+
+        output = run_java_command(
+            bsagio,
+            "COMPILE",
+            args,
+            [config.javac, *args],
+            cwd=working_dir,
+            timeout=config.command_timeout,
+        )
+        return record_command_result(bsagio, config, output)
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from pydantic import PositiveInt
+
+from bsag import BaseStepConfig, BaseStepDefinition
+from bsag.bsagio import BSAGIO
+
+from ._server import JAVA_SERVER_KEY, CompileServer, CompileServerError
+
+
+class CompileServerConfig(BaseStepConfig):
+    working_dir: Path | None = None
+    java: str = "java"
+    javac: str = "javac"
+    jvm_args: list[str] = []
+    startup_timeout: PositiveInt = 30
+    idle_timeout: PositiveInt = 600
+
+
+class StartCompileServer(BaseStepDefinition[CompileServerConfig]):
+    @staticmethod
+    def name() -> str:
+        return "java.compile_server"
+
+    @classmethod
+    def display_name(cls, _config: CompileServerConfig) -> str:
+        return "Java Compile Server"
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: CompileServerConfig) -> bool:
+        try:
+            server = CompileServer.start(
+                config.working_dir or Path.cwd(),
+                java=config.java,
+                javac=config.javac,
+                jvm_args=config.jvm_args,
+                startup_timeout=config.startup_timeout,
+                idle_timeout=config.idle_timeout,
+            )
+        except (CompileServerError, OSError) as e:
+            # Later steps start a fresh JVM per command instead, so this is not a failure
+            bsagio.private.warning(f"Could not start compile server: {e}")
+            return True
+
+        bsagio.add_cleanup(server.stop)
+        bsagio.data[JAVA_SERVER_KEY] = server
+        bsagio.private.debug(f"Compile server listening on port {server.port} in {server.working_dir}")
+        return True
@@ -0,0 +1,63 @@
+import os
+from typing import Any
+
+from bsag import BaseStepDefinition
+from bsag.bsagio import BSAGIO
+from bsag.steps.common.run_command import CommandOutputConfig, record_command_result, replay_command_result
+
+from ._server import run_java_command
+
+# Test runners whose mains call System.exit, which would take the compile server down with them
+EXITING_MAIN_CLASSES = frozenset(
+    {
+        "org.junit.runner.JUnitCore",
+        "org.junit.platform.console.ConsoleLauncher",
+        "org.testng.TestNG",
+    }
+)
+
+
+class JavaRunConfig(CommandOutputConfig):
+    main_class: str
+    args: list[str] = []
+    classpath: list[str] = ["."]
+    java: str = "java"
+    # JVM flags can't be applied to the compile server, so setting these always starts a new JVM
+    jvm_args: list[str] = []
+    # The compile server only supports main methods that return; set this to false if `main_class` calls System.exit.
+    # Known test runners, such as JUnitCore, always start a new JVM.
+    use_compile_server: bool = True
+    # Lets `gradescope.incremental_regrade` replay this step's result instead of running it
+    reusable: bool = False
+
+
+class JavaRun(BaseStepDefinition[JavaRunConfig]):
+    @staticmethod
+    def name() -> str:
+        return "java.run"
+
+    @classmethod
+    def display_name(cls, config: JavaRunConfig) -> str:
+        return config.display_name
+
+    @classmethod
+    def run(cls, bsagio: BSAGIO, config: JavaRunConfig) -> bool:
+        classpath = os.pathsep.join(config.classpath)
+        use_server = config.use_compile_server and not config.jvm_args and config.main_class not in EXITING_MAIN_CLASSES
+        output = run_java_command(
+            bsagio,
+            "RUN",
+            [classpath, config.main_class, *config.args] if use_server else None,
+            [config.java, *config.jvm_args, "-cp", classpath, config.main_class, *config.args],
+            cwd=config.working_dir,
+            timeout=config.command_timeout,
+        )
+        return record_command_result(bsagio, config, output)
+
+    @classmethod
+    def reusable(cls, config: JavaRunConfig) -> bool:
+        return config.reusable
+
+    @classmethod
+    def replay(cls, bsagio: BSAGIO, _config: JavaRunConfig, record: dict[str, Any]) -> bool:
+        return replay_command_result(bsagio, record)
@@ -0,0 +1,143 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+from bsag.utils.hashing import hash_paths, iter_files
+from bsag.utils.workdirs import materialize_file
+
+ENTRY_FILES_DIR = "files"
+ENTRY_META_FILE = "meta.json"
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in iter_files(path))
+
+
+class ArtifactCache:
+    """Content-addressed store of build outputs, shared by every grader on the same host.
+
+    Entries are keyed by a hash of the inputs that produced them. Cached files are made read-only, since with
+    `allow_hardlink` they are shared with every working directory they are materialized into; copies get their
+    original permissions back when materialized. An exclusive `flock`
+    guards writes and eviction; reads take a shared lock. Once the cache exceeds `max_bytes`, least-recently-used
+    entries are evicted.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str],
+        max_bytes: int | None = None,
+        allow_hardlink: bool = False,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.allow_hardlink = allow_hardlink
+        self._entries = self.root / "entries"
+        self._tmp = self.root / "tmp"
+        self._entries.mkdir(parents=True, exist_ok=True)
+        self._tmp.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.root / ".lock"
+
+    @contextlib.contextmanager
+    def _lock(self, exclusive: bool) -> Iterator[None]:
+        with self._lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def compute_key(
+        command: str | Sequence[str] | Sequence[Sequence[str]],
+        inputs: Sequence[str],
+        outputs: Sequence[str],
+        base_dir: str | os.PathLike[str],
+        shell: bool = False,
+    ) -> str:
+        h = hashlib.blake2b(digest_size=32)
+        h.update(json.dumps({"command": command, "shell": shell, "outputs": sorted(outputs)}, sort_keys=True).encode())
+        h.update(hash_paths(sorted(inputs), base_dir).encode())
+        return h.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self._entries / key
+
+    def fetch(self, key: str, dest_dir: str | os.PathLike[str]) -> str | None:
+        """Materializes the outputs stored under `key` into `dest_dir`.
+
+        Returns the command output recorded with the entry, or None on a cache miss.
+        """
+        entry = self._entry_dir(key)
+        with self._lock(exclusive=False):
+            if not (entry / ENTRY_META_FILE).is_file():
+                return None
+            meta = json.loads((entry / ENTRY_META_FILE).read_text(encoding="utf-8"))
+            modes: dict[str, int] = meta.get("modes", {})
+            files_dir = entry / ENTRY_FILES_DIR
+            for src in iter_files(files_dir):
+                rel_path = src.relative_to(files_dir)
+                dst = Path(dest_dir, rel_path)
+                materialize_file(src, dst, self.allow_hardlink)
+                if not dst.samefile(src):
+                    # Copies and reflinks are private to `dest_dir`, so they must be as writable as a fresh build's
+                    dst.chmod(modes.get(rel_path.as_posix(), stat.S_IMODE(src.stat().st_mode) | stat.S_IWUSR))
+            # Entry mtime doubles as its LRU timestamp
+            now = time.time()
+            os.utime(entry, (now, now))
+        return str(meta["output"])
+
+    def store(self, key: str, outputs: Sequence[str], src_dir: str | os.PathLike[str], output: str) -> None:
+        """Copies `outputs` (relative to `src_dir`) into the cache under `key`, then evicts if over the size limit."""
+        staging = Path(tempfile.mkdtemp(dir=self._tmp))
+        try:
+            files_dir = staging / ENTRY_FILES_DIR
+            modes: dict[str, int] = {}
+            for out in outputs:
+                for src in iter_files(Path(src_dir, out)):
+                    rel_path = src.relative_to(src_dir)
+                    dst = files_dir / rel_path
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(src, dst)
+                    mode = stat.S_IMODE(dst.stat().st_mode)
+                    modes[rel_path.as_posix()] = mode
+                    dst.chmod(mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+            meta = {"output": output, "size": _dir_size(staging), "modes": modes}
+            (staging / ENTRY_META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+            with self._lock(exclusive=True):
+                entry = self._entry_dir(key)
+                if entry.exists():
+                    # Another grader got here first; its entry is equivalent
+                    return
+                staging.rename(entry)
+                self._evict()
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def _evict(self) -> None:
+        """Removes least-recently-used entries until under `max_bytes`. Caller must hold the exclusive lock."""
+        if self.max_bytes is None:
+            return
+        entries: list[tuple[float, int, Path]] = []
+        for entry in self._entries.iterdir():
+            try:
+                meta = json.loads((entry / ENTRY_META_FILE).read_text(encoding="utf-8"))
+                entries.append((entry.stat().st_mtime, int(meta["size"]), entry))
+            except (OSError, ValueError, KeyError):
+                shutil.rmtree(entry, ignore_errors=True)
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
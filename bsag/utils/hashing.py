@@ -0,0 +1,59 @@
+import hashlib
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path: str | os.PathLike[str]) -> str:
+    h = hashlib.blake2b(digest_size=32)
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with Path(path).open("rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def iter_files(root: str | os.PathLike[str]) -> Iterable[Path]:
+    """Yields every regular file under `root` (or `root` itself if it is a file), in sorted order."""
+    root = Path(root)
+    if root.is_file():
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = Path(dirpath, filename)
+            if path.is_file():
+                yield path
+
+
+def hash_paths(paths: Iterable[str | os.PathLike[str]], base_dir: str | os.PathLike[str]) -> str:
+    """Hashes the names and contents of all files under `paths`.
+
+    Names are relative to `base_dir`, except for absolute `paths` outside it, which are named by their absolute path.
+    """
+    h = hashlib.blake2b(digest_size=32)
+    for path in paths:
+        full_path = Path(base_dir, path)
+        if not full_path.exists():
+            h.update(f"{path}\0missing\0".encode())
+            continue
+        for file in iter_files(full_path):
+            name = file.relative_to(base_dir) if file.is_relative_to(base_dir) else file
+            h.update(f"{name}\0{hash_file(file)}\0".encode())
+    return h.hexdigest()
+
+
+def hash_tree(root: str | os.PathLike[str], max_workers: int | None = None) -> str:
+    """Like `hash_paths` on a single directory, but hashes files in parallel (hashlib releases the GIL)."""
+    files = list(iter_files(root))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        digests = executor.map(hash_file, files)
+        h = hashlib.blake2b(digest_size=32)
+        for file, digest in zip(files, digests, strict=True):
+            h.update(f"{file.relative_to(root)}\0{digest}\0".encode())
+    return h.hexdigest()
@@ -0,0 +1,139 @@
+import hashlib
+import mmap
+import os
+import re
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from bsag.utils.hashing import hash_file, iter_files
+
+MANIFEST_KEY = "submission_manifest"
+"""Created by `common.manifest`.
+
+Type: `SubmissionManifest`
+"""
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    root: Path
+    path: str
+    """POSIX-style path relative to the manifest root."""
+    size: int
+    mtime: float
+    digest: str | None = None
+
+    @property
+    def full_path(self) -> Path:
+        return self.root / self.path
+
+    def mmap(self) -> mmap.mmap | None:
+        """Maps the file read-only, or returns None for empty files (which can't be mapped). Close when done."""
+        if self.size == 0:
+            return None
+        with self.full_path.open("rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> re.Pattern[str]:
+    """Translates a glob where `*` and `?` stay within a path component and `**/` matches any number of directories."""
+    i = 0
+    regex = ""
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and (end := pattern.find("]", i + 2)) != -1:
+            body = pattern[i + 1 : end].replace("\\", "\\\\")
+            regex += "[^" + body[1:] + "]" if body.startswith("!") else "[" + body + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r"\Z")
+
+
+class SubmissionManifest:
+    """Every file of a submission, with sizes, modification times and (optionally) content hashes, read once.
+
+    Steps that check required files, sizes or contents should query this instead of walking the submission again.
+    """
+
+    def __init__(self, root: Path, entries: list[ManifestEntry], hashed: bool) -> None:
+        self.root = root
+        self.hashed = hashed
+        self._entries = {e.path: e for e in entries}
+
+    @classmethod
+    def build(
+        cls,
+        root: str | os.PathLike[str],
+        hash_contents: bool = True,
+        max_workers: int | None = None,
+    ) -> "SubmissionManifest":
+        root = Path(root)
+        files = list(iter_files(root))
+        digests: list[str | None] = [None] * len(files)
+        if hash_contents:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                digests = list(executor.map(hash_file, files))
+
+        entries = []
+        for file, digest in zip(files, digests, strict=True):
+            st = file.stat()
+            entries.append(ManifestEntry(root, file.relative_to(root).as_posix(), st.st_size, st.st_mtime, digest))
+        return cls(root, entries, hash_contents)
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        return iter(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._entries
+
+    def __getitem__(self, path: str) -> ManifestEntry:
+        return self._entries[path]
+
+    @property
+    def total_size(self) -> int:
+        return sum(e.size for e in self)
+
+    def glob(self, pattern: str) -> list[ManifestEntry]:
+        regex = _compile_glob(pattern)
+        return [e for e in self if regex.match(e.path)]
+
+    def select(
+        self,
+        pattern: str | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+    ) -> list[ManifestEntry]:
+        entries = self.glob(pattern) if pattern is not None else list(self)
+        return [
+            e for e in entries if (min_size is None or e.size >= min_size) and (max_size is None or e.size <= max_size)
+        ]
+
+    def digest(self) -> str:
+        """Hash of all file names and contents; equal to `hash_tree` of the root."""
+        if not self.hashed:
+            msg = "Manifest was built without content hashes"
+            raise ValueError(msg)
+        h = hashlib.blake2b(digest_size=32)
+        for e in self:
+            h.update(f"{Path(e.path)}\0{e.digest}\0".encode())
+        return h.hexdigest()
@@ -1,3 +1,4 @@
+import contextlib
 import os
 import signal
 import subprocess
@@ -13,6 +14,10 @@ class SubprocessResult:
     stderr: str | None
     return_code: int
     timed_out: bool
+    cpu_time: float | None = None
+    """User plus system CPU seconds of the process and its reaped descendants, if measured."""
+    stage_return_codes: list[int] | None = None
+    """Return code of each stage, for pipelines."""
 
 
 def run_subprocess(
@@ -53,3 +58,186 @@ def run_subprocess(
         timed_bomb.cancel()
 
     return SubprocessResult(p_stdout, p_stderr, return_code, killed)
+
+
+def run_measured_subprocess(
+    command: str | Sequence[str | os.PathLike[str]],
+    cwd: str | os.PathLike[str] | None = None,
+    timeout: float | None = None,
+    shell: bool = False,
+) -> SubprocessResult:
+    """Like `run_subprocess`, but also measures `cpu_time` from the resource usage reported when reaping the process.
+
+    Unlike wall time, CPU time is barely affected by other load on the machine, and unlike `RUSAGE_CHILDREN` it only
+    counts this process, even while other threads are running commands of their own.
+    """
+    if cwd is None:
+        cwd = Path.cwd()
+
+    killed = False
+
+    def kill(p: subprocess.Popen[str]) -> None:
+        # Not `poll`, which would reap the process before `wait4` can
+        if p.returncode is None:
+            nonlocal killed
+            killed = True
+            # The process may be reaped between the check and the kill
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(p.pid, signal.SIGTERM)
+
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        cwd=cwd,
+        text=True,
+        shell=shell,
+        start_new_session=True,
+    )
+    assert process.stdout is not None
+    output: list[str] = []
+    reader = threading.Thread(target=lambda: output.append(process.stdout.read()))  # type: ignore[union-attr]
+    reader.start()
+    timed_bomb = None
+    if timeout:
+        timed_bomb = threading.Timer(timeout, kill, [process])
+        timed_bomb.start()
+
+    # Reap the process ourselves, as `Popen.wait` discards its resource usage
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if timed_bomb is not None:
+        timed_bomb.cancel()
+    reader.join()
+    process.stdout.close()
+
+    return SubprocessResult("".join(output), None, process.returncode, killed, usage.ru_utime + usage.ru_stime)
+
+
+def run_pipeline(
+    commands: Sequence[Sequence[str | os.PathLike[str]]],
+    cwd: str | os.PathLike[str] | None = None,
+    timeout: int | None = None,
+    separate_stderr: bool = False,
+) -> SubprocessResult:
+    """Runs `commands` with each one's stdout piped into the next one's stdin, like a shell pipeline without a shell.
+
+    Data streams between stages through OS pipes. Without `separate_stderr`, the stderr of every stage is interleaved
+    with the last stage's stdout, like `(a | b) 2>&1`. The timeout kills every stage. The return code is that of the
+    last stage to fail, as with `set -o pipefail`, except that a stage killed by SIGPIPE (as `yes` in `yes | head`) did
+    not fail; it was only writing after a later stage stopped reading.
+    """
+    if cwd is None:
+        cwd = Path.cwd()
+
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe() if separate_stderr else (None, None)
+    try:
+        processes = _spawn_pipeline(commands, cwd, out_w, err_w if err_w is not None else out_w)
+    except BaseException:
+        os.close(out_r)
+        if err_r is not None:
+            os.close(err_r)
+        raise
+    finally:
+        # Only the stages hold the write ends, so reading sees EOF once they all exit
+        os.close(out_w)
+        if err_w is not None:
+            os.close(err_w)
+
+    killed = False
+
+    def kill() -> None:
+        nonlocal killed
+        if _kill_stages(processes):
+            killed = True
+
+    timed_bomb = None
+    if timeout:
+        timed_bomb = threading.Timer(timeout, kill)
+        timed_bomb.start()
+
+    stderr: list[str] = []
+    err_reader = None
+    if err_r is not None:
+        err_reader = threading.Thread(target=lambda: stderr.append(_read_fd(err_r)))
+        err_reader.start()
+    output = _read_fd(out_r)
+    if err_reader is not None:
+        err_reader.join()
+    return_codes = [p.wait() for p in processes]
+    if timed_bomb is not None:
+        timed_bomb.cancel()
+
+    return_code = next((code for code in reversed(return_codes) if code not in (0, -signal.SIGPIPE)), 0)
+    return SubprocessResult(
+        output,
+        "".join(stderr) if separate_stderr else None,
+        return_code,
+        killed,
+        stage_return_codes=return_codes,
+    )
+
+
+def _spawn_pipeline(
+    commands: Sequence[Sequence[str | os.PathLike[str]]],
+    cwd: str | os.PathLike[str],
+    out_w: int,
+    err_w: int,
+) -> list[subprocess.Popen[bytes]]:
+    """Starts the stages of `run_pipeline`, the last writing its stdout to `out_w` and all their stderr to `err_w`.
+
+    If a stage cannot be started, the ones that were are killed before the error propagates.
+    """
+    processes: list[subprocess.Popen[bytes]] = []
+    stdin: int | None = None
+    try:
+        for i, command in enumerate(commands):
+            next_stdin: int | None = None
+            stdout_w = out_w
+            if i < len(commands) - 1:
+                next_stdin, stdout_w = os.pipe()
+            try:
+                processes.append(
+                    subprocess.Popen(
+                        command,
+                        stdin=stdin,
+                        stdout=stdout_w,
+                        stderr=err_w,
+                        cwd=cwd,
+                        start_new_session=True,
+                    )
+                )
+            finally:
+                # Only the stages hold the pipe ends they use, so each sees EOF or SIGPIPE once its neighbour exits
+                if stdin is not None:
+                    os.close(stdin)
+                stdin = next_stdin
+                if stdout_w != out_w:
+                    os.close(stdout_w)
+    except BaseException:
+        _kill_stages(processes)
+        for p in processes:
+            p.wait()
+        raise
+    finally:
+        if stdin is not None:
+            os.close(stdin)
+    return processes
+
+
+def _kill_stages(processes: list[subprocess.Popen[bytes]]) -> bool:
+    """Kills every stage unless all have exited. Returns whether any were killed."""
+    if all(p.poll() is not None for p in processes):
+        return False
+    for p in processes:
+        # Each stage leads its own process group, which outlives the stage if it is reaped first
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(p.pid, signal.SIGTERM)
+    return True
+
+
+def _read_fd(fd: int) -> str:
+    # Decoded like the `text=True` output of `run_subprocess`
+    with os.fdopen(fd, encoding=None, errors="replace") as f:
+        return f.read()
@@ -0,0 +1,126 @@
+import contextlib
+import errno
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from enum import Enum
+from pathlib import Path
+
+# From linux/fs.h; clones a file's extents on copy-on-write filesystems (btrfs, XFS).
+FICLONE = 0x40049409
+
+
+class CloneMode(str, Enum):
+    REFLINK = "reflink"
+    """Copy-on-write clones where the filesystem supports them, full copies otherwise."""
+    HARDLINK = "hardlink"
+    """Hardlink farm. Cheapest, but rewriting a file in place (not replacing it) also changes the original."""
+    COPY = "copy"
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def materialize_file(src: Path, dst: Path, allow_hardlink: bool = False, try_reflink: bool = True) -> bool:
+    """Places `src` at `dst` as cheaply as possible: reflink, then hardlink (if allowed), then a full copy.
+
+    Hardlinks share the inode with `src`, so anything that rewrites `dst` in place (e.g. `cp` over it as root) also
+    rewrites `src`. Only allow them when `dst` is never modified. Returns whether a reflink was made.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        dst.unlink()
+    if try_reflink:
+        try:
+            _reflink(src, dst)
+            shutil.copystat(src, dst)
+            return True
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                dst.unlink()
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return False
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    shutil.copy2(src, dst)
+    return False
+
+
+def clone_tree(
+    src: str | os.PathLike[str],
+    mode: CloneMode,
+    parent_dir: str | os.PathLike[str] | None = None,
+) -> Path:
+    """Clones `src` into a fresh temporary directory under `parent_dir` and returns it. Symlinks are kept as is."""
+    src = Path(src)
+    dst = Path(tempfile.mkdtemp(prefix="bsag-workdir-", dir=parent_dir))
+    # Reflink support is unknown until the first attempt
+    try_reflink: bool | None = None if mode == CloneMode.REFLINK else False
+    for dirpath, dirnames, filenames in os.walk(src):
+        rel_dir = Path(dirpath).relative_to(src)
+        for name in dirnames + filenames:
+            src_path = Path(dirpath, name)
+            dst_path = dst / rel_dir / name
+            if src_path.is_symlink():
+                dst_path.symlink_to(src_path.readlink())
+            elif src_path.is_dir():
+                dst_path.mkdir()
+                shutil.copystat(src_path, dst_path)
+            elif mode == CloneMode.HARDLINK:
+                materialize_file(src_path, dst_path, allow_hardlink=True, try_reflink=False)
+            else:
+                reflinked = materialize_file(src_path, dst_path, try_reflink=try_reflink is not False)
+                if try_reflink is None:
+                    try_reflink = reflinked
+    return dst
+
+
+class _CleanupState:
+    executor: ThreadPoolExecutor
+    pending: set[Future[None]]
+    lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bsag-cleanup")
+        self.pending = set()
+        self.lock = threading.Lock()
+
+
+_cleanup = _CleanupState()
+# The parent's worker thread does not exist in a forked child, and the lock may have been held while forking
+os.register_at_fork(after_in_child=_cleanup.reset)
+
+
+def _remove_tree(path: Path) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def remove_tree_async(path: str | os.PathLike[str]) -> None:
+    """Removes `path` in the background. The interpreter waits for pending removals before exiting normally."""
+    future = _cleanup.executor.submit(_remove_tree, Path(path))
+    with _cleanup.lock:
+        _cleanup.pending.add(future)
+    future.add_done_callback(_discard_cleanup)
+
+
+def _discard_cleanup(future: Future[None]) -> None:
+    with _cleanup.lock:
+        _cleanup.pending.discard(future)
+
+
+def wait_for_cleanup() -> None:
+    """Blocks until background removals finish; needed before `os._exit`, which skips the interpreter's wait."""
+    with _cleanup.lock:
+        pending = list(_cleanup.pending)
+    wait(pending)